@@ -3,14 +3,14 @@ main module
 """
 from __future__ import annotations
 
-from itertools import takewhile, islice, chain, repeat
+from itertools import takewhile, islice
 from math import log
 
 from modules.Convergense3_5_3 import sqrt_stream, pi_stream, euler_transform, accelerated_sequence, ln2_stream
 from modules.Math import is_divisible
 from modules.Sequence import fibonacci_generator, eratosthenes_sieve, integers_from_ones, fibonacci_adding, double, \
     factorial, humming_stream, expand, pythagorean_triples
-from modules.Series import exponential, sine, cosine, inverted_unit_series, make_series, tangent, constant_series, \
+from modules.Series import exponential, sine, cosine, inverted_unit_series, polynomial, tangent, constant_series, \
     secant
 from modules.Stream import integers_starting_from, integers, stream_reference, partial_sums, \
     make_stream, Stream, stream_limit, pairs, pairs_all, triples
@@ -62,7 +62,7 @@ def main() -> None:
           f" {list(islice(cosine() * cosine() + sine() * sine(), 10))}")
 
     print(f"1/(1-x) ="
-          f" {list(islice(inverted_unit_series(make_series(make_stream(chain([1.0, -1.0], repeat(0.0))))), 10))}")
+          f" {list(islice(inverted_unit_series(polynomial([1.0, -1.0])), 10))}")
     print(f"(secant-series) = {list(islice(secant(), 10))}")
     print(f"exercise 3.61: (tangent-series) = {list(islice(tangent(), 10))}")
     print(f"exercise 3.61: 1 + tan^2 - sec^2 ="
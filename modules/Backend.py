@@ -0,0 +1,41 @@
+"""
+optional backend module
+
+NumPy, gmpy2 のような重い依存は最初に使うときに読み込む。
+インストールされていなければ None を返し、呼び出し側は純 Python の経路を使う。
+"""
+from __future__ import annotations
+
+import importlib
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+
+@lru_cache(maxsize=None)
+def _optional_module(name: str) -> Optional[ModuleType]:
+    """
+    import a module if installed
+    Args:
+        name: module name
+    Returns:
+        the module, or None if it is not installed
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+def numpy_backend() -> Optional[ModuleType]:
+    """
+    numpy module, or None
+    """
+    return _optional_module("numpy")
+
+
+def gmpy2_backend() -> Optional[ModuleType]:
+    """
+    gmpy2 module, or None
+    """
+    return _optional_module("gmpy2")
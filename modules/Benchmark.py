@@ -0,0 +1,179 @@
+"""
+benchmark module
+
+    python -m modules.Benchmark                  # all benchmarks
+    python -m modules.Benchmark --import-budget  # only the import time of modules (CI などで)
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+import tracemalloc
+from itertools import count, islice
+from typing import Iterator, Optional
+
+from modules.Prefetch import prefetched
+from modules.Stream import Stream, make_stream, copy_stream, integers, pairs
+
+IMPORT_TIME_BUDGET: float = 0.005  # import modules にかけてよい秒数
+
+
+def is_free_threaded() -> bool:
+    """
+    free-threaded (no GIL) CPython build or not
+    """
+    if not sysconfig.get_config_var("Py_GIL_DISABLED"):
+        return False
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is None or not is_gil_enabled()
+
+
+def concurrent_read_throughput(n_threads: int, n_elements: int = 100_000, n_rounds: int = 10) -> float:
+    """
+    reads per second of a shared memoized stream read by threads through their own cursors
+    Args:
+        n_threads: number of reader threads
+        n_elements: length of the stream prefix read by each thread per round
+        n_rounds: number of passes over the prefix by each thread
+    Returns:
+        total reads per second
+    """
+    shared: Stream[int] = make_stream(count())
+    shared.nth(n_elements - 1)  # 計算済みの値の読み出しだけを測る
+    barrier: threading.Barrier = threading.Barrier(n_threads + 1)
+
+    def reader() -> None:
+        """
+        reader thread
+        """
+        barrier.wait()
+        for _ in range(n_rounds):
+            cursor: Stream[int] = copy_stream(shared)
+            for _ in range(n_elements):
+                next(cursor)
+
+    threads: list[threading.Thread] = [threading.Thread(target=reader) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start: float = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed: float = time.perf_counter() - start
+    return n_threads * n_elements * n_rounds / elapsed
+
+
+def memory_per_stream(n_streams: int = 100_000) -> tuple[float, float]:
+    """
+    bytes traced per live stream
+    Args:
+        n_streams: number of streams kept alive at once
+    Returns:
+        (bytes per make_stream(count()) including its memo and iterator, bytes per copy_stream cursor)
+    """
+    tracemalloc.start()
+    try:
+        start: int = tracemalloc.get_traced_memory()[0]
+        streams: list[Stream[int]] = [make_stream(count()) for _ in range(n_streams)]
+        fresh: float = (tracemalloc.get_traced_memory()[0] - start) / n_streams
+        start = tracemalloc.get_traced_memory()[0]
+        cursors: list[Stream[int]] = [copy_stream(streams[0]) for _ in range(n_streams)]
+        copied: float = (tracemalloc.get_traced_memory()[0] - start) / n_streams
+    finally:
+        tracemalloc.stop()
+    del streams, cursors
+    return fresh, copied
+
+
+def pairs_memory(n_elements: int = 100) -> float:
+    """
+    bytes traced per element taken from sec 3.5.3 pairs(integers(), integers()), whose generators keep
+    new streams alive at every step (about four per element)
+    """
+    tracemalloc.start()
+    try:
+        start: int = tracemalloc.get_traced_memory()[0]
+        enumeration: Stream[tuple[int, int]] = pairs(integers(), integers())
+        for _ in islice(enumeration, n_elements):
+            pass
+        used: float = (tracemalloc.get_traced_memory()[0] - start) / n_elements
+    finally:
+        tracemalloc.stop()
+    del enumeration
+    return used
+
+
+def prefetch_speedup(n_elements: int = 200, work: float = 0.001) -> float:
+    """
+    speedup of a consumer by prefetching when producing and consuming each element take work seconds
+    without holding the GIL (time.sleep)
+    """
+    def expensive() -> Iterator[int]:
+        """
+        slow producer
+        """
+        for i in count():
+            time.sleep(work)
+            yield i
+
+    elapsed: list[float] = []
+    for stream in (make_stream(expensive()), prefetched(make_stream(expensive()))):
+        start: float = time.perf_counter()
+        for _ in islice(stream, n_elements):
+            time.sleep(work)
+        elapsed.append(time.perf_counter() - start)
+    return elapsed[0] / elapsed[1]
+
+
+def import_time(module_name: str = "modules", n_trials: int = 5) -> float:
+    """
+    seconds to import a module in a fresh interpreter (best of trials)
+    Args:
+        module_name: module to import
+        n_trials: number of fresh interpreters
+    Returns:
+        the shortest import time
+    """
+    script: str = (f"import time; start = time.perf_counter(); import {module_name}; "
+                   f"print(time.perf_counter() - start)")
+    return min(float(subprocess.run([sys.executable, "-c", script], capture_output=True, text=True,
+                                    check=True).stdout)
+               for _ in range(n_trials))
+
+
+def check_import_budget() -> None:
+    """
+    print the import time of modules and exit with an error if it exceeds IMPORT_TIME_BUDGET
+    """
+    seconds: float = import_time()
+    print(f"import modules = {seconds * 1.0e3:.2f} ms (budget {IMPORT_TIME_BUDGET * 1.0e3:.0f} ms)")
+    if seconds > IMPORT_TIME_BUDGET:
+        sys.exit("import modules exceeds the import-time budget")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """
+    print benchmarks (予算を超えたら他のベンチマークを待たずに止まるよう、インポート時間を先に測る)
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(prog="python -m modules.Benchmark",
+                                                              description="print benchmarks")
+    parser.add_argument("--import-budget", action="store_true", help="only check the import-time budget")
+    arguments: argparse.Namespace = parser.parse_args(argv)
+    check_import_budget()
+    if arguments.import_budget:
+        return
+    print(f"free-threaded: {is_free_threaded()}")
+    for n_threads in (1, 2, 4, 8):
+        print(f"concurrent reads ({n_threads} threads) = {concurrent_read_throughput(n_threads):.3e} /s")
+    fresh, copied = memory_per_stream()
+    print(f"memory per live stream = {fresh:.0f} B, per copied cursor = {copied:.0f} B")
+    print(f"memory of pairs(integers(), integers()) = {pairs_memory():.0f} B per element")
+    print(f"prefetch speedup = {prefetch_speedup():.2f}")
+
+
+if __name__ == '__main__':
+    main()
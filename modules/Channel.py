@@ -0,0 +1,325 @@
+"""
+channel module
+
+一つのプロセスがストリームの値を共有メモリに書き込み、他のプロセスは名前で接続して
+同じ値をコピーせずに読むストリームとして使う。
+
+    # 書き手
+    with StreamPublisher(primes(), capacity=1 << 20) as publisher:
+        print(publisher.name)  # 読み手に渡す
+        publisher.publish()
+
+    # 読み手 (別プロセス)
+    shared_primes = attach(name)
+    shared_primes.nth(1000)
+
+共有メモリは追記のみの int64 または float64 の配列で、先頭の見出しに書き込み済みの要素数を持つ。
+読み手は書き込み済みの要素数より先を読もうとすると、次のどちらかで待つ。
+
+- notifier (multiprocessing の Condition) を書き手と読み手に渡したとき: 書き手が要素数を更新するたびに起こされる
+- 渡さないとき: 間隔を広げながら (最大 MAX_POLL_INTERVAL 秒) 見出しを読み直す
+
+名前だけで接続する無関係なプロセスどうしでは、標準ライブラリに名前で開ける通知の仕組みが無いので、
+既定ではあえてポーリングにしている。同じ親から起動するワーカーには notifier を渡すとよい。
+
+    notifier = multiprocessing.Condition()
+    publisher = StreamPublisher(primes(), capacity=1 << 20, notifier=notifier)
+    # ワーカーに publisher.name と notifier を渡し、attach(name, notifier=notifier)
+"""
+from __future__ import annotations
+
+import struct
+import sys
+import threading
+import time
+import weakref
+from array import array
+from itertools import islice
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import TypeVar, Iterator, Optional, Union, Any
+
+from modules.Stream import Stream, MemoizedInfiniteSequence, copy_stream
+
+T = TypeVar("T")
+Number = Union[int, float]
+
+MAGIC: bytes = b"sicpstrm"
+_HEADER: struct.Struct = struct.Struct("<8sc?6xqq")  # magic, typecode, closed, capacity, count
+_CLOSED_OFFSET: int = 9
+_COUNT_OFFSET: int = 24
+_COUNT: struct.Struct = struct.Struct("<q")
+_CLOSED: struct.Struct = struct.Struct("<?")
+
+FIRST_POLL_INTERVAL: float = 5.0e-5  # 読み手が待つときの最初の間隔 (秒)
+MAX_POLL_INTERVAL: float = 2.0e-3
+NOTIFIED_WAIT_INTERVAL: float = 0.1  # notifier で待つときも、通知しない書き手に備えてこの間隔で見直す
+
+_attach_lock: threading.Lock = threading.Lock()
+
+
+class ChannelError(ValueError):
+    """
+    invalid channel
+    """
+
+
+def _typecode(value: Number) -> str:
+    """
+    array typecode of the elements ('q': int64, 'd': float64)
+    """
+    if isinstance(value, int):
+        return "q"
+    if isinstance(value, float):
+        return "d"
+    raise ChannelError(f"a channel holds int or float elements, not {type(value).__name__}")
+
+
+def _data(memory: SharedMemory, typecode: str, readonly: bool) -> memoryview:
+    """
+    elements of a channel as a memoryview of the shared memory
+    """
+    buffer: memoryview = memory.buf[_HEADER.size:]
+    if readonly:
+        buffer = buffer.toreadonly()
+    return buffer.cast(typecode)
+
+
+def _release(data: memoryview, memory: SharedMemory, unlink: bool) -> None:
+    """
+    release the memoryview before closing the shared memory (exported pointers があると閉じられない)
+    """
+    data.release()
+    memory.close()
+    if unlink:
+        memory.unlink()
+
+
+class StreamPublisher:
+    """
+    ストリームの値を共有メモリに書き込む側
+    """
+
+    def __init__(self, stream: Stream[Number], capacity: int, name: Optional[str] = None,
+                 typecode: Optional[str] = None, notifier: Optional[Any] = None):
+        """
+        Args:
+            stream: stream of int or float values, published from its cursor
+            capacity: maximum number of elements (the channel ends there)
+            name: name of the shared memory (a unique name if omitted)
+            typecode: 'q' (int64) or 'd' (float64); inferred from the first value if omitted
+            notifier: multiprocessing.Condition notified whenever elements become visible
+        """
+        self._notifier: Optional[Any] = notifier
+        if capacity < 1:
+            raise ValueError("capacity must be positive.")
+        self._values: Stream[Number] = copy_stream(stream)
+        if typecode is None:
+            typecode = _typecode(self._values.nth(self._values.current_index))
+        if typecode not in ("q", "d"):
+            raise ChannelError(f"unsupported typecode: {typecode}")
+        self.typecode: str = typecode
+        self.capacity: int = capacity
+        self.count: int = 0  # 公開済みの要素数
+        self._memory: SharedMemory = SharedMemory(name=name, create=True, size=_HEADER.size + 8 * capacity)
+        _HEADER.pack_into(self._memory.buf, 0, MAGIC, typecode.encode("ascii"), False, capacity, 0)
+        self._data: memoryview = _data(self._memory, typecode, readonly=False)
+        self._finalizer: weakref.finalize = weakref.finalize(self, _release, self._data, self._memory, True)
+
+    @property
+    def name(self) -> str:
+        """
+        name for attach
+        """
+        return self._memory.name
+
+    @property
+    def closed(self) -> bool:
+        """
+        no more elements will be published
+        """
+        return _CLOSED.unpack_from(self._memory.buf, _CLOSED_OFFSET)[0]
+
+    def publish(self, n: Optional[int] = None, block: int = 4096, max_delay: float = 0.01) -> int:
+        """
+        publish the next values of the stream
+        要素は block 個ごと、または前回から max_delay 秒たったら、書き込み済みの要素数を更新して読み手に見せる
+        Args:
+            n: number of elements to publish (up to the capacity if omitted)
+            block: maximum number of elements made visible at once
+            max_delay: seconds after which written elements are made visible
+        Returns:
+            number of elements published by this call
+        """
+        limit: int = self.capacity if n is None else min(self.count + n, self.capacity)
+        start: int = self.count
+        pending: array = array(self.typecode)
+        deadline: float = time.monotonic() + max_delay
+        for value in islice(self._values, limit - self.count):
+            pending.append(value)
+            if len(pending) >= block or time.monotonic() >= deadline:
+                self._flush(pending)
+                deadline = time.monotonic() + max_delay
+        self._flush(pending)
+        if self.count < limit or self.count == self.capacity:  # ストリームが尽きたか、容量に達した
+            self.close()
+        return self.count - start
+
+    def _flush(self, pending: array) -> None:
+        """
+        write the pending elements, then make them visible (要素数は値を書いた後に更新する)
+        """
+        if not pending:
+            return
+        self._data[self.count:self.count + len(pending)] = memoryview(pending)
+        self.count += len(pending)
+        _COUNT.pack_into(self._memory.buf, _COUNT_OFFSET, self.count)
+        del pending[:]
+        self._notify()
+
+    def _notify(self) -> None:
+        """
+        wake the readers waiting on the notifier (要素数を書いた後に通知するので、読み手は取りこぼさない)
+        """
+        if self._notifier is not None:
+            with self._notifier:
+                self._notifier.notify_all()
+
+    def close(self) -> None:
+        """
+        tell the readers that no more elements will be published
+        """
+        _CLOSED.pack_into(self._memory.buf, _CLOSED_OFFSET, True)
+        self._notify()
+
+    def unlink(self) -> None:
+        """
+        close the channel and remove the shared memory (読み手が開いているメモリはそのまま読める)
+        """
+        self.close()
+        self._finalizer()
+
+    def __enter__(self) -> StreamPublisher:
+        return self
+
+    def __exit__(self, *exception) -> None:
+        self.unlink()
+
+
+class ChannelSequence(MemoizedInfiniteSequence[Number]):
+    """
+    共有メモリの値をコピーせずに読む、読み出し専用のメモ
+    """
+    __slots__ = ("_memory", "_data", "_published", "timeout", "notifier")
+
+    def __init__(self, memory: SharedMemory, timeout: Optional[float] = None, notifier: Optional[Any] = None):
+        super().__init__(iter(()))
+        magic, typecode, _closed, capacity, _count = _HEADER.unpack_from(memory.buf, 0)
+        if magic != MAGIC:
+            raise ChannelError(f"not a stream channel: {memory.name}")
+        self._memory: SharedMemory = memory
+        self._data: memoryview = _data(memory, typecode.decode("ascii"), readonly=True)[:capacity]
+        self._published: int = 0  # 最後に読んだ書き込み済みの要素数
+        self.timeout: Optional[float] = timeout  # 書き手を待つ秒数の上限 (None: 無制限)
+        self.notifier: Optional[Any] = notifier  # 書き手が通知する Condition (None: ポーリング)
+        weakref.finalize(self, _release, self._data, memory, False)
+
+    def __len__(self) -> int:
+        self._published = _COUNT.unpack_from(self._memory.buf, _COUNT_OFFSET)[0]
+        return self._published
+
+    @property
+    def closed(self) -> bool:
+        """
+        the publisher will write no more elements
+        """
+        return _CLOSED.unpack_from(self._memory.buf, _CLOSED_OFFSET)[0]
+
+    def value(self, index: int) -> Number:
+        """
+        インデックスに対する値 (まだ書かれていなければ書き手を待つ)
+        """
+        if index < self._published:
+            return self._data[index]
+        interval: float = FIRST_POLL_INTERVAL
+        deadline: Optional[float] = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            if self.notifier is not None:
+                with self.notifier:  # 通知の前に要素数が書かれるので、ロックを取ってから確かめれば取りこぼさない
+                    if self._ready(index, deadline):
+                        return self._data[index]
+                    wait: float = NOTIFIED_WAIT_INTERVAL
+                    if deadline is not None:
+                        wait = min(wait, max(deadline - time.monotonic(), 0.0))
+                    self.notifier.wait(wait)
+                continue
+            if self._ready(index, deadline):
+                return self._data[index]
+            time.sleep(interval)
+            interval = min(2.0 * interval, MAX_POLL_INTERVAL)
+
+    def _ready(self, index: int, deadline: Optional[float]) -> bool:
+        """
+        the value at index is published or not (StopIteration if the channel ended before it)
+        """
+        closed: bool = self.closed  # 閉じた後に要素数を読めば、最後の要素まで見える
+        if index < len(self):
+            return True
+        if closed:
+            raise StopIteration
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"no value at {index} in the channel {self._memory.name}")
+        return False
+
+    def uncomputed(self) -> Iterator[Number]:
+        """
+        values after the published ones, waiting for the publisher
+        """
+        index: int = self._published
+        while True:
+            try:
+                yield self.value(index)
+            except StopIteration:
+                return
+            index += 1
+
+    def tail(self, start: int) -> list[Number]:
+        """
+        values from start to the last published index
+        """
+        return self._data[start:len(self)].tolist()
+
+
+def _attach_memory(name: str) -> SharedMemory:
+    """
+    open shared memory made by another process without registering it to the resource tracker
+    (登録すると、読み手のプロセスが終わるときに書き手のメモリが消されてしまう)
+    """
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    with _attach_lock:  # Python 3.12 以前は track が無いので、開く間だけこのメモリの登録を飛ばす
+        register = resource_tracker.register
+
+        def register_others(resource_name: str, resource_type: str) -> None:
+            """
+            register everything but this channel (同時に作られる他の共有メモリは登録する)
+            """
+            if resource_type != "shared_memory" or resource_name.lstrip("/") != name.lstrip("/"):
+                register(resource_name, resource_type)
+
+        resource_tracker.register = register_others
+        try:
+            return SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def attach(name: str, timeout: Optional[float] = None, notifier: Optional[Any] = None) -> Stream[Number]:
+    """
+    read-only stream over a channel published by StreamPublisher
+    Args:
+        name: name of the channel (StreamPublisher.name)
+        timeout: seconds to wait for an unpublished element at most (TimeoutError)
+        notifier: the notifier given to StreamPublisher (None: poll the channel)
+    """
+    return Stream(values=ChannelSequence(_attach_memory(name), timeout, notifier))
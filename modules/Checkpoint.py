@@ -0,0 +1,328 @@
+"""
+checkpoint module
+
+生成器の状態は pickle できないので、状態を明示的に持つ生成器 (producer) でストリームを作り、
+その状態と直近の値をファイルに保存して別プロセスで同じインデックスから再開する。
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+from fractions import Fraction
+from typing import TypeVar, Iterator, Generic, Optional, Any, ClassVar
+
+from modules.Stream import Stream, MemoizedInfiniteSequence, make_stream
+
+T = TypeVar("T")
+
+FORMAT: str = "sicp-stream-checkpoint"
+VERSION: int = 1
+
+
+class CheckpointError(ValueError):
+    """
+    invalid checkpoint
+    """
+
+
+def _encode(value: Any) -> Any:
+    """
+    JSON representation of a value
+    """
+    if isinstance(value, Fraction):
+        return {"fraction": [value.numerator, value.denominator]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {"mapping": [[_encode(k), _encode(v)] for k, v in value.items()]}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    """
+    value from its JSON representation
+    """
+    if isinstance(value, dict):
+        if set(value) == {"fraction"}:
+            numerator, denominator = value["fraction"]
+            return Fraction(numerator, denominator)
+        if set(value) == {"mapping"}:
+            return {_decode(k): _decode(v) for k, v in value["mapping"]}
+        raise CheckpointError(f"unknown value: {value}")
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+class Producer(Generic[T]):
+    """
+    状態を明示的に持つ生成器
+    サブクラスは dataclass とし、フィールドは int, float, Fraction, list, dict, Producer に限る。
+    """
+    _registry: ClassVar[dict[str, type[Producer]]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        Producer._registry[cls.__name__] = cls
+
+    def __iter__(self) -> Iterator[T]:
+        return self
+
+    def __next__(self) -> T:
+        raise NotImplementedError()
+
+    def state(self) -> dict[str, Any]:
+        """
+        serializable state
+        """
+        return {field.name: self._field_state(getattr(self, field.name)) for field in dataclasses.fields(self)}
+
+    @staticmethod
+    def _field_state(value: Any) -> Any:
+        if isinstance(value, Producer):
+            return {"producer": type(value).__name__, "state": value.state()}
+        return _encode(value)
+
+    @staticmethod
+    def restore(name: str, state: dict[str, Any]) -> Producer:
+        """
+        producer from its name and state
+        """
+        if name not in Producer._registry:
+            raise CheckpointError(f"unknown producer: {name}")
+        cls: type[Producer] = Producer._registry[name]
+        names: set[str] = {field.name for field in dataclasses.fields(cls)}
+        if set(state) != names:
+            raise CheckpointError(f"state of {name} must have fields {sorted(names)}")
+        decoded: dict[str, Any] = {}
+        for key, value in state.items():
+            if isinstance(value, dict) and set(value) == {"producer", "state"}:
+                decoded[key] = Producer.restore(value["producer"], value["state"])
+            else:
+                decoded[key] = _decode(value)
+        return cls(**decoded)
+
+
+@dataclasses.dataclass
+class SqrtProducer(Producer[float]):
+    """
+    sec 3.5.3 sqrt-stream
+    """
+    x: float
+    guess: float = 1.0
+
+    def __next__(self) -> float:
+        current: float = self.guess
+        self.guess = (current + self.x / current) / 2.0
+        return current
+
+
+@dataclasses.dataclass
+class AlternatingPartialSumProducer(Producer[float]):
+    """
+    partial sums of scale * (1/n - 1/(n+step) + 1/(n+2 step) - ...)
+    pi-stream は (n, step, scale) = (1, 2, 4)、ln2-stream は (1, 1, 1)
+    """
+    n: float = 1.0
+    step: float = 2.0
+    scale: float = 4.0
+    sign: float = 1.0
+    total: float = 0.0
+
+    def __next__(self) -> float:
+        self.total += self.sign / self.n
+        self.n += self.step
+        self.sign = -self.sign
+        return self.total * self.scale
+
+
+@dataclasses.dataclass
+class EulerAcceleratedProducer(Producer[float]):
+    """
+    sec 3.5.3 accelerated-sequence of euler-transform (modules.Convergense3_5_3.accelerated_sequence と同じ値)
+    tableau の各行のうち、これまでに計算した先頭部分を保持する
+    """
+    source: Producer[float]
+    rows: list[list[float]] = dataclasses.field(default_factory=list)  # rows[k]: k 回変換した列の先頭部分
+
+    def __next__(self) -> float:
+        depth: int = len(self.rows)
+        self.rows.append([])
+        # accelerated_sequence は各行の先頭を取り出してから次の変換を掛けるので、
+        # k 回変換した列の j 番目は k-1 回変換した列の j+1 番目から 3 つで決まる
+        for k in range(depth + 1):
+            needed: int = 3 * (depth - k) + 1
+            row: list[float] = self.rows[k]
+            while len(row) < needed:
+                if k == 0:
+                    row.append(next(self.source))
+                else:
+                    below: list[float] = self.rows[k - 1]
+                    s0, s1, s2 = below[len(row) + 1: len(row) + 4]
+                    row.append(s2 - (s2 - s1) * (s2 - s1) / (s0 - 2.0 * s1 + s2))
+        return self.rows[depth][0]
+
+
+@dataclasses.dataclass
+class PrimeProducer(Producer[int]):
+    """
+    incremental sieve of Eratosthenes (modules.Sequence.prime_generator) with explicit state
+    """
+    n: int = 0  # 次に調べる数 (0 のうちは 2, 3, 5, 7 を順に返す)
+    small: int = 0
+    composites: dict[int, int] = dataclasses.field(default_factory=dict)  # 次の合成数 -> 刻み幅
+    p: int = 3
+    square: int = 9
+    base: Optional[PrimeProducer] = None
+
+    def __next__(self) -> int:
+        if self.n == 0:
+            if self.small < 3:
+                self.small += 1
+                return (2, 3, 5, 7)[self.small - 1]
+            self.n = 9
+            self.base = PrimeProducer(small=2)  # 3 の次から
+            return 7
+        composites: dict[int, int] = self.composites
+        while True:
+            n: int = self.n
+            self.n += 2
+            if n in composites:
+                step: int = composites.pop(n)
+            elif n < self.square:
+                return n
+            else:
+                step = 2 * self.p
+                self.p = next(self.base)
+                self.square = self.p * self.p
+            multiple: int = n + step
+            while multiple in composites:
+                multiple += step
+            composites[multiple] = step
+
+
+@dataclasses.dataclass
+class PolynomialODEProducer(Producer[float]):
+    """
+    sec 3.5.4 solve: y' = c0 + c1 y + c2 y^2 + ... を刻み dt で解く
+    """
+    coefficients: list[float]
+    dt: float
+    y: float
+
+    def __next__(self) -> float:
+        current: float = self.y
+        slope: float = 0.0
+        for c in reversed(self.coefficients):
+            slope = slope * current + c
+        self.y = current + slope * self.dt
+        return current
+
+
+def checkpointable_stream(producer: Producer[T]) -> Stream[T]:
+    """
+    stream whose state can be saved
+    """
+    return make_stream(producer)
+
+
+def _checksum(payload: dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def save_checkpoint(stream: Stream[T], path: str, n_retained: int = 2) -> None:
+    """
+    save a stream made by checkpointable_stream
+    Args:
+        stream: stream
+        path: checkpoint file (replaced atomically)
+        n_retained: number of the latest values saved with the producer state
+    """
+    memo: MemoizedInfiniteSequence[T] = stream.values
+    producer = memo._iterator
+    if not isinstance(producer, Producer):
+        raise CheckpointError("stream is not made by checkpointable_stream")
+    with memo.idle():
+        produced: int = len(memo)
+        start: int = max(min(stream.current_index, produced) - n_retained, 0)
+        payload: dict[str, Any] = {
+            "producer": type(producer).__name__,
+            "state": producer.state(),
+            "produced": produced,
+            "cursor": stream.current_index,
+            "retained_from": start,
+            "retained": _encode(memo.tail(start)),
+        }
+    checkpoint: dict[str, Any] = {"format": FORMAT, "version": VERSION, "checksum": _checksum(payload),
+                                  "payload": payload}
+    temporary: str = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+_PAYLOAD_TYPES: dict[str, type] = {"producer": str, "state": dict, "produced": int, "cursor": int,
+                                   "retained_from": int, "retained": list}
+
+
+def _check_payload(payload: Any) -> None:
+    """
+    keys and types of a payload (チェックサムが合っても、別の版や手で書いたファイルかもしれない)
+    """
+    if not isinstance(payload, dict):
+        raise CheckpointError("payload must be a mapping")
+    missing: list[str] = sorted(set(_PAYLOAD_TYPES) - set(payload))
+    if missing:
+        raise CheckpointError(f"payload lacks {missing}")
+    for key, expected in _PAYLOAD_TYPES.items():
+        value: Any = payload[key]
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise CheckpointError(f"payload {key} must be {expected.__name__}, not {type(value).__name__}")
+        if expected is int and value < 0:
+            raise CheckpointError(f"payload {key} must be non-negative")
+    if payload["cursor"] < payload["retained_from"]:
+        raise CheckpointError("cursor is before the retained values")
+
+
+def load_checkpoint(path: str) -> Stream:
+    """
+    resume a stream at the cursor saved by save_checkpoint
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            checkpoint: dict[str, Any] = json.load(file)
+    except json.JSONDecodeError as error:
+        raise CheckpointError(f"broken checkpoint: {path}") from error
+    if not isinstance(checkpoint, dict) or checkpoint.get("format") != FORMAT:
+        raise CheckpointError(f"not a stream checkpoint: {path}")
+    if checkpoint.get("version") != VERSION:
+        raise CheckpointError(f"unsupported checkpoint version: {checkpoint.get('version')}")
+    payload: dict[str, Any] = checkpoint.get("payload", {})
+    if checkpoint.get("checksum") != _checksum(payload):
+        raise CheckpointError(f"checksum mismatch: {path}")
+    _check_payload(payload)
+    try:
+        retained: list = _decode(payload["retained"])
+        producer: Producer = Producer.restore(payload["producer"], payload["state"])
+    except CheckpointError:
+        raise
+    except (TypeError, ValueError) as error:  # 値や状態の形が壊れている
+        raise CheckpointError(f"broken checkpoint: {path}") from error
+    if payload["retained_from"] + len(retained) != payload["produced"]:
+        raise CheckpointError("retained values do not end at the producer state")
+    memo: MemoizedInfiniteSequence = MemoizedInfiniteSequence.resumed(producer, payload["retained_from"], retained)
+    return Stream(values=memo, _current_index=payload["cursor"])
+
+
+def checkpointing(stream: Stream[T], path: str, every: int) -> Iterator[T]:
+    """
+    values of a stream, saving a checkpoint every given number of elements
+    """
+    for i, value in enumerate(stream, start=1):
+        if i % every == 0:
+            save_checkpoint(stream, path)
+        yield value
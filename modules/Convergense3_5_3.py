@@ -3,9 +3,15 @@ sec 3.5.3
 """
 from __future__ import annotations
 
+import math
+from decimal import Decimal, localcontext
+from fractions import Fraction
 from itertools import chain
-from typing import TypeVar, Iterator, Callable
+from typing import TypeVar, Iterator, Callable, Optional
 
+from modules.Backend import gmpy2_backend
+from modules.Registry import canonical
+from modules.Sequence import radix_digits
 from modules.Stream import Stream, make_stream, partial_sums
 
 T = TypeVar("T")
@@ -18,6 +24,7 @@ def sqrt_improve(guess: float, x: float) -> float:
     return (guess + x / guess) / 2.0
 
 
+@canonical
 def sqrt_stream(x: float) -> Stream[float]:
     """
     sec 3.5.3 sqrt-stream
@@ -44,6 +51,7 @@ def pi_summands(n: float) -> Stream[float]:
     return make_stream(pi_generator())
 
 
+@canonical
 def pi_stream() -> Stream[float]:
     """
     sec 3.5.3 pi-stream
@@ -105,8 +113,169 @@ def ln2_summands(n: float) -> Stream[float]:
     return make_stream(ln2_generator())
 
 
+@canonical
 def ln2_stream() -> Stream[float]:
     """
     exercise 3.65
     """
     return partial_sums(ln2_summands(1.0))
+
+
+# 以下は収束の速い級数を二分割 (binary splitting) で有理数のまま足し、要素ごとに精度を倍にする。
+# atan(1/q) = sum (-1)^k / ((2k+1) q^(2k+1)), atanh(1/q) = sum 1 / ((2k+1) q^(2k+1))
+
+MACHIN_PI: tuple[tuple[int, int, int], ...] = ((16, 5, -1), (-4, 239, -1))  # pi = 16 atan(1/5) - 4 atan(1/239)
+ATANH_LN2: tuple[tuple[int, int, int], ...] = ((18, 26, 1), (-2, 4801, 1), (8, 8749, 1))
+INITIAL_DIGITS: int = 16
+
+
+def _split_leaf(k: int, q: int, sign: int, integer: Callable[[int], int]) -> tuple[int, int, int, int]:
+    """
+    (P, Q, B, T) of the kth term: 和は T / (B Q)、P / Q はその項までの比の積
+    """
+    p: int = integer(1 if k == 0 else sign)
+    return p, integer(q if k == 0 else q * q), integer(2 * k + 1), p
+
+
+def _split_combine(left: tuple[int, int, int, int], right: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+    """
+    (P, Q, B, T) of adjacent ranges
+    """
+    p1, q1, b1, t1 = left
+    p2, q2, b2, t2 = right
+    return p1 * p2, q1 * q2, b1 * b2, b2 * q2 * t1 + b1 * p1 * t2
+
+
+def _binary_split(a: int, b: int, q: int, sign: int, integer: Callable[[int], int]) -> tuple[int, int, int, int]:
+    """
+    (P, Q, B, T) of the terms a <= k < b
+    """
+    if b - a == 1:
+        return _split_leaf(a, q, sign, integer)
+    m: int = (a + b) // 2
+    return _split_combine(_binary_split(a, m, q, sign, integer), _binary_split(m, b, q, sign, integer))
+
+
+def _arctangent_intervals(formula: tuple[tuple[int, int, int], ...]) -> Iterator[tuple[int, int, Fraction]]:
+    """
+    (numerator, denominator, error bound) of sum c atan(1/q) (sign -1) or c atanh(1/q) (sign 1), doubling digits
+    前の要素までの部分和に新しい範囲の部分和を継ぎ足す。巨大な整数の約分は避けて分子と分母のまま返す
+    gmpy2 があれば多倍長整数の演算を mpz で行う
+    """
+    gmpy2 = gmpy2_backend()
+    integer: Callable[[int], int] = int if gmpy2 is None else gmpy2.mpz
+    sums: list[Optional[tuple[int, int, int, int]]] = [None] * len(formula)
+    terms: list[int] = [0] * len(formula)
+    digits: int = INITIAL_DIGITS
+    while True:
+        numerator: int = 0
+        denominator: int = 1
+        error: Fraction = Fraction(0)
+        for i, (c, q, sign) in enumerate(formula):
+            # 打ち切り誤差 < q^-(2N+1) / (1 - q^-2) を 10^-digits より小さくする項数 N
+            needed: int = math.ceil(digits * math.log(10) / (2.0 * math.log(q))) + 1
+            if needed > terms[i]:
+                new: tuple[int, int, int, int] = _binary_split(terms[i], needed, q, sign, integer)
+                sums[i] = new if sums[i] is None else _split_combine(sums[i], new)
+                terms[i] = needed
+            _p, qq, b, t = sums[i]
+            numerator, denominator = numerator * b * qq + c * t * denominator, denominator * b * qq
+            error += abs(c) * Fraction(q * q, (2 * terms[i] + 1) * q ** (2 * terms[i] + 1) * (q * q - 1))
+        yield numerator, denominator, error
+        digits *= 2
+
+
+def _log10(x: Fraction) -> float:
+    """
+    approximate log10 of a positive rational number too small for float
+    """
+    shift: int = x.numerator.bit_length() - x.denominator.bit_length()
+    return shift * math.log10(2.0) + math.log10(float(x / Fraction(2) ** shift))
+
+
+def _certain_digits(intervals: Iterator[tuple[int, int, Fraction]]) -> Iterator[list[int]]:
+    """
+    blocks of decimal digits (the integer part first) common to both ends of each interval
+    """
+    emitted: Optional[int] = None  # 出力済みの小数部の桁数 (整数部をまだ出していなければ None)
+    for numerator, denominator, error in intervals:
+        m: int = max(math.floor(-_log10(2 * error)), 0)
+        # 10^m 倍した近似値を一度の除算で求め、誤差 (1 未満の切り捨てを含む) の幅で両端を挟む
+        scale: int = 10 ** m
+        middle: int = numerator * scale // denominator
+        width: int = math.ceil(error * scale) + 1
+        low: int = middle - width
+        high: int = middle + width
+        shift: int = 0  # 両端で一致しない下位の桁数
+        while m - shift >= 0 and low // 10 ** shift != high // 10 ** shift:
+            shift += 1
+        m -= shift
+        if m < 0 or (emitted is not None and m <= emitted):
+            continue
+        integer, fraction = divmod(low // 10 ** shift, 10 ** m)
+        block: list[int] = [int(integer)] if emitted is None else []
+        done: int = emitted or 0
+        block += radix_digits(fraction % 10 ** (m - done), 10, m - done)
+        emitted = m
+        yield block
+
+
+def _decimals(intervals: Iterator[tuple[int, int, Fraction]]) -> Iterator[Decimal]:
+    """
+    approximations as Decimal with as many digits as the error bound allows
+    """
+    for numerator, denominator, error in intervals:
+        precision: int = max(math.floor(-_log10(error)), 1) + 1
+        with localcontext() as context:
+            context.prec = precision
+            yield Decimal(int(numerator)) / Decimal(int(denominator))
+
+
+@canonical
+def pi_fractions() -> Stream[Fraction]:
+    """
+    rational approximations of pi by Machin's formula; each element doubles the correct digits
+    """
+    return make_stream(Fraction(int(numerator), int(denominator))
+                       for numerator, denominator, _error in _arctangent_intervals(MACHIN_PI))
+
+
+@canonical
+def pi_decimals() -> Stream[Decimal]:
+    """
+    Decimal approximations of pi with doubling precision
+    """
+    return make_stream(_decimals(_arctangent_intervals(MACHIN_PI)))
+
+
+@canonical
+def pi_digits() -> Stream[int]:
+    """
+    decimal digits of pi: 3, 1, 4, 1, 5, ... (computed in blocks)
+    """
+    return make_stream(chain.from_iterable(_certain_digits(_arctangent_intervals(MACHIN_PI))))
+
+
+@canonical
+def ln2_fractions() -> Stream[Fraction]:
+    """
+    rational approximations of ln 2 = 18 atanh(1/26) - 2 atanh(1/4801) + 8 atanh(1/8749)
+    """
+    return make_stream(Fraction(int(numerator), int(denominator))
+                       for numerator, denominator, _error in _arctangent_intervals(ATANH_LN2))
+
+
+@canonical
+def ln2_decimals() -> Stream[Decimal]:
+    """
+    Decimal approximations of ln 2 with doubling precision
+    """
+    return make_stream(_decimals(_arctangent_intervals(ATANH_LN2)))
+
+
+@canonical
+def ln2_digits() -> Stream[int]:
+    """
+    decimal digits of ln 2: 0, 6, 9, 3, 1, ... (computed in blocks)
+    """
+    return make_stream(chain.from_iterable(_certain_digits(_arctangent_intervals(ATANH_LN2))))
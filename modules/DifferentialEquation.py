@@ -3,8 +3,11 @@ sec 3.5.3 differential equations
 """
 from __future__ import annotations
 
-from typing import TypeVar, Iterator
+import math
+from itertools import count
+from typing import TypeVar, Iterator, Callable, Optional
 
+from modules.Series import integrated_coefficients, make_series
 from modules.Stream import Stream, make_stream
 
 T = TypeVar("T")
@@ -21,3 +24,201 @@ def integral(integrand: Stream[float], initial_value: float, dt: float) -> Strea
         yield initial_value
         yield from integrand * dt + make_stream(integration_generator())
     return make_stream(integration_generator())
+
+
+class TaylorTerm:
+    """
+    テイラー係数を低次から順に計算してキャッシュする式の節点
+    多項式・有理式の右辺を、+, -, *, / と整数べきでこの節点の式として組み立てる (自動微分)
+    """
+
+    def __init__(self):
+        self._coefficients: list[float] = []
+
+    def coefficient(self, k: int) -> float:
+        """
+        kth Taylor coefficient
+        """
+        while len(self._coefficients) <= k:
+            self._coefficients.append(self._next_coefficient(len(self._coefficients)))
+        return self._coefficients[k]
+
+    def _next_coefficient(self, k: int) -> float:
+        raise NotImplementedError()
+
+    def __add__(self, other) -> TaylorTerm:
+        return _TaylorSum(self, _term(other), 1.0)
+
+    def __radd__(self, other) -> TaylorTerm:
+        return _TaylorSum(_term(other), self, 1.0)
+
+    def __sub__(self, other) -> TaylorTerm:
+        return _TaylorSum(self, _term(other), -1.0)
+
+    def __rsub__(self, other) -> TaylorTerm:
+        return _TaylorSum(_term(other), self, -1.0)
+
+    def __neg__(self) -> TaylorTerm:
+        return _TaylorSum(_TaylorConstant(0.0), self, -1.0)
+
+    def __mul__(self, other) -> TaylorTerm:
+        return _TaylorProduct(self, _term(other))
+
+    def __rmul__(self, other) -> TaylorTerm:
+        return _TaylorProduct(_term(other), self)
+
+    def __truediv__(self, other) -> TaylorTerm:
+        return _TaylorQuotient(self, _term(other))
+
+    def __rtruediv__(self, other) -> TaylorTerm:
+        return _TaylorQuotient(_term(other), self)
+
+    def __pow__(self, exponent: int) -> TaylorTerm:
+        if not isinstance(exponent, int):  # 整数乗だけ (y ** 0.5 などは TypeError になる)
+            return NotImplemented
+        if exponent < 0:
+            return 1.0 / self ** (-exponent)
+        result: TaylorTerm = _TaylorConstant(1.0)
+        base: TaylorTerm = self
+        while exponent > 0:
+            if exponent & 1:
+                result = result * base
+            base = base * base
+            exponent >>= 1
+        return result
+
+
+def _term(value) -> TaylorTerm:
+    """
+    wrap a constant
+    """
+    return value if isinstance(value, TaylorTerm) else _TaylorConstant(value)
+
+
+class _TaylorConstant(TaylorTerm):
+    def __init__(self, value: float):
+        super().__init__()
+        self._value: float = value
+
+    def _next_coefficient(self, k: int) -> float:
+        return self._value if k == 0 else 0.0
+
+
+class _TaylorVariable(TaylorTerm):
+    """
+    未知関数: 係数は解のストリームから読む
+    """
+    def __init__(self):
+        super().__init__()
+        self.solution: Optional[Stream[float]] = None
+
+    def coefficient(self, k: int) -> float:
+        return self.solution.nth(k)
+
+
+class _TaylorSum(TaylorTerm):
+    def __init__(self, a: TaylorTerm, b: TaylorTerm, sign: float):
+        super().__init__()
+        self._a, self._b, self._sign = a, b, sign
+
+    def _next_coefficient(self, k: int) -> float:
+        return self._a.coefficient(k) + self._sign * self._b.coefficient(k)
+
+
+class _TaylorProduct(TaylorTerm):
+    def __init__(self, a: TaylorTerm, b: TaylorTerm):
+        super().__init__()
+        self._a, self._b = a, b
+
+    def _next_coefficient(self, k: int) -> float:
+        return sum(self._a.coefficient(i) * self._b.coefficient(k - i) for i in range(k + 1))
+
+
+class _TaylorQuotient(TaylorTerm):
+    def __init__(self, a: TaylorTerm, b: TaylorTerm):
+        super().__init__()
+        self._a, self._b = a, b
+
+    def _next_coefficient(self, k: int) -> float:
+        # a = q b より q_k = (a_k - sum_{i=1..k} b_i q_{k-i}) / b_0
+        return ((self._a.coefficient(k) - sum(self._b.coefficient(i) * self.coefficient(k - i)
+                                              for i in range(1, k + 1)))
+                / self._b.coefficient(0))
+
+
+def taylor_series_solution(derivative: Callable, initial_value):
+    """
+    power series solution of y' = f(y) around the initial point (exercise 3.59 の積分を用いる)
+    Args:
+        derivative: f; takes and returns TaylorTerm (a tuple of them for a system)
+        initial_value: y(0) (a tuple for a system)
+    Returns:
+        Series of y (a tuple of Series for a system)
+    """
+    system: bool = isinstance(initial_value, (tuple, list))
+    initial_values: tuple = tuple(initial_value) if system else (initial_value,)
+    variables: list[_TaylorVariable] = [_TaylorVariable() for _ in initial_values]
+    derivatives = derivative(*variables)
+    derivatives = tuple(map(_term, derivatives)) if system else (_term(derivatives),)
+    if len(derivatives) != len(variables):
+        raise ValueError("the derivative must have as many components as the initial value.")
+    for variable, y0, dy in zip(variables, initial_values, derivatives):
+        # y_{k+1} = (f(y))_k / (k+1): 右辺の k 次の係数は y の k 次までの係数だけで決まる
+        variable.solution = integrated_coefficients(y0, map(dy.coefficient, count()))
+    solutions: tuple = tuple(make_series(variable.solution) for variable in variables)
+    return solutions if system else solutions[0]
+
+
+def _taylor_step(coefficients: list[list[float]], order: int, tolerance: float, max_step: float) -> float:
+    """
+    step size from the decay of the last two coefficients (Jorba and Zou)
+    """
+    step: float = math.inf
+    for k in (order - 1, order):
+        norm: float = max(abs(c[k]) for c in coefficients)
+        if norm > 0.0:
+            step = min(step, (tolerance / norm) ** (1.0 / k))
+    return min(step * math.exp(-2.0), max_step)  # exp(-2) は安全係数
+
+
+def taylor_solve(derivative: Callable, initial_value, t0: float = 0.0, order: int = 20,
+                 tolerance: float = 1.0e-12, max_step: float = 1.0) -> Stream[tuple]:
+    """
+    Taylor method for y' = f(y): stream of (t, y) with step sizes adapted to the coefficient decay
+    非自律系は t を t' = 1 の未知関数として加える
+    Args:
+        derivative: f; takes and returns TaylorTerm (a tuple of them for a system)
+        initial_value: y(t0) (a tuple for a system)
+        t0: initial time
+        order: degree of the truncated series
+        tolerance: local error per step relative to max(1, |y|)
+        max_step: upper limit of the step size
+    """
+    system: bool = isinstance(initial_value, (tuple, list))
+
+    def taylor_generator() -> Iterator[tuple]:
+        """
+        steps
+        """
+        t: float = t0
+        y: tuple = tuple(initial_value) if system else (initial_value,)
+        while True:
+            yield (t, y) if system else (t, y[0])
+            solutions = taylor_series_solution(derivative, y if system else y[0])
+            solutions = solutions if system else (solutions,)
+            coefficients: list[list[float]] = [[s.nth(k) for k in range(order + 1)] for s in solutions]
+            scale: float = max(1.0, max(abs(v) for v in y))
+            h: float = _taylor_step(coefficients, order, tolerance * scale, max_step)
+            y = tuple(horner(c, h) for c in coefficients)
+            t += h
+    return make_stream(taylor_generator())
+
+
+def horner(coefficients: list[float], x: float) -> float:
+    """
+    polynomial value by Horner's method
+    """
+    value: float = 0.0
+    for c in reversed(coefficients):
+        value = value * x + c
+    return value
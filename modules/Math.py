@@ -3,7 +3,9 @@ math module
 """
 from __future__ import annotations
 
+import math
 import random
+from itertools import chain
 
 
 def power(x, y, p):
@@ -125,3 +127,93 @@ def is_divisible(m: int, n: int) -> bool:
         True if divisible
     """
     return m % n == 0
+
+
+def pollard_rho(n: int) -> int:
+    """
+    a non-trivial factor of a composite number by Pollard's rho (Brent's cycle detection)
+    Args:
+        n: odd composite number
+    Returns:
+        a factor 1 < d < n
+    """
+    while True:
+        c: int = random.randrange(1, n)
+        y: int = random.randrange(0, n)
+        m: int = 128
+        g: int = 1
+        r: int = 1
+        q: int = 1
+        x: int = y
+        ys: int = y
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k: int = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+        if g == n:
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def factorize(n: int, precision: int = 20) -> dict[int, int]:
+    """
+    prime factorization
+    Args:
+        n: positive integer
+        precision: number of Miller-Rabin trials for each factor
+    Returns:
+        prime -> exponent
+    """
+    factors: dict[int, int] = {}
+    for p in (2, 3, 5, 7, 11, 13):
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    composites: list[int] = [n] if n > 1 else []
+    while composites:
+        m: int = composites.pop()
+        if is_prime(m, precision):
+            factors[m] = factors.get(m, 0) + 1
+        else:
+            d: int = pollard_rho(m)
+            composites += [d, m // d]
+    return factors
+
+
+def multiplicative_order(a: int, n: int) -> int:
+    """
+    the least k > 0 with a^k = 1 (mod n)
+    Args:
+        a: integer coprime to n
+        n: modulus
+    Returns:
+        order of a modulo n
+    """
+    if n == 1:
+        return 1
+    if math.gcd(a, n) != 1:
+        raise ValueError("the multiplicative order needs a number coprime to the modulus.")
+    # 位数は phi(n) の約数なので、phi(n) から素因数を外せるだけ外す
+    phi_factors: dict[int, int] = {}
+    for p, e in factorize(n).items():
+        for q, f in chain(factorize(p - 1).items(), [(p, e - 1)]):
+            if f > 0:
+                phi_factors[q] = phi_factors.get(q, 0) + f
+    order: int = math.prod(q ** f for q, f in phi_factors.items())
+    for q in phi_factors:
+        while order % q == 0 and pow(a, order // q, n) == 1:
+            order //= q
+    return order
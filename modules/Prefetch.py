@@ -0,0 +1,196 @@
+"""
+prefetch module
+
+高価なストリームの値を、読み手より先にバックグラウンドのスレッドで計算してメモに入れておく。
+
+    primes_ahead = prefetched(primes(), lookahead=256)
+
+スレッドは prefetched が返したカーソル (とそのコピー) のうち最も進んだものから、
+lookahead 以上先まで値を計算したら休み、読み手が近づいたら再開する。
+先読みの量は読み手の消費速度から決める。スレッドはメモの弱参照だけを持ち、
+先読みするカーソルがすべて回収されるか、メモが回収されると終わる
+(レジストリに登録されたメモはカーソルより長く残る)。
+GIL のあるビルドで計算が重なるのは、読み手が I/O などで GIL を手放している間に限る。
+"""
+from __future__ import annotations
+
+import math
+import sys
+import threading
+import time
+import weakref
+from typing import TypeVar, Optional
+
+from modules.Stream import Stream, MemoizedInfiniteSequence
+
+T = TypeVar("T")
+
+DEFAULT_MEMORY_LIMIT: int = 64 * 1024 * 1024  # 先読みした値に使ってよいバイト数
+_cursors_lock: threading.Lock = threading.Lock()  # カーソルの数を数える (回収は任意のスレッドで起きる)
+
+
+class Prefetcher:
+    """
+    メモを先読みするスレッドとその状態
+    """
+    __slots__ = ("minimum", "maximum", "horizon", "memory_limit", "lookahead", "furthest", "rate", "cursors",
+                 "_wake", "_stopped", "_thread", "__weakref__")
+
+    def __init__(self, memo: MemoizedInfiniteSequence[T], furthest: int, minimum: int, maximum: int,
+                 horizon: float, memory_limit: int):
+        self.minimum: int = minimum
+        self.maximum: int = maximum
+        self.horizon: float = horizon
+        self.memory_limit: int = memory_limit
+        self.lookahead: int = minimum  # 最も進んだカーソルからこれだけ先まで計算する
+        self.furthest: int = furthest  # 最も進んだカーソルの位置
+        self.rate: float = 0.0  # 読み手の消費速度 (要素/秒) の移動平均
+        self.cursors: int = 0  # 生きている先読みカーソルの数
+        self._wake: threading.Event = threading.Event()
+        self._stopped: bool = False
+        self._thread: threading.Thread = threading.Thread(target=self._run, args=(weakref.ref(memo),),
+                                                          name="stream-prefetch", daemon=True)
+        weakref.finalize(memo, self.stop)
+        self._thread.start()
+
+    @property
+    def low_water(self) -> int:
+        """
+        number of values ahead of the furthest cursor below which the thread resumes
+        """
+        return self.lookahead // 2
+
+    def advance(self, index: int, computed: int) -> None:
+        """
+        record the position of a cursor and wake the thread if it is close to the end of the memo
+        """
+        if index > self.furthest:
+            self.furthest = index
+            if computed - index < self.low_water:
+                self._wake.set()
+
+    def track(self, cursor: PrefetchingStream) -> None:
+        """
+        count a cursor until it is collected (最後のカーソルが回収されたらスレッドを止める)
+        """
+        with _cursors_lock:
+            self.cursors += 1
+        weakref.finalize(cursor, self._release)
+
+    def _release(self) -> None:
+        """
+        a cursor was collected
+        """
+        with _cursors_lock:
+            self.cursors -= 1
+            last: bool = self.cursors == 0
+        if last:
+            self.stop()
+
+    def stop(self) -> None:
+        """
+        stop the thread (called when the memo or the last cursor is collected)
+        """
+        self._stopped = True
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        """
+        the thread is alive or not
+        """
+        return self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        wait for the thread to finish
+        """
+        self._thread.join(timeout)
+
+    def _adapt(self, elapsed: float, consumed: int) -> None:
+        """
+        update the consumption rate and the lookahead covering horizon seconds of consumption
+        """
+        if elapsed > 0.0:
+            self.rate = (self.rate + consumed / elapsed) / 2.0
+        self.lookahead = min(max(math.ceil(self.rate * self.horizon), self.minimum), self.maximum)
+
+    def _run(self, memo_reference: weakref.ReferenceType) -> None:
+        """
+        body of the thread; メモへの強参照は一要素を計算する間だけ持つ
+        """
+        last_time: float = time.monotonic()
+        last_furthest: int = self.furthest
+        while not self._stopped:
+            now: float = time.monotonic()
+            if now - last_time >= self.horizon:
+                self._adapt(now - last_time, self.furthest - last_furthest)
+                last_time, last_furthest = now, self.furthest
+            memo: Optional[MemoizedInfiniteSequence] = memo_reference()
+            if memo is None:
+                return
+            computed: int = len(memo)
+            if computed < self.furthest + self.lookahead and not self._over_limit(memo, computed):
+                try:
+                    memo.value(computed)  # 一要素ずつ伸ばし、待っている読み手をすぐ起こす
+                except StopIteration:
+                    return
+                except Exception:  # 例外はメモに残り、読み手がこの位置を読むと同じ例外が送出される
+                    return
+                if len(memo) <= computed:  # 値を返してもメモが伸びない (次数を過ぎた多項式の 0 など)
+                    return
+                del memo
+                continue
+            del memo
+            self._wake.wait()  # 待つ前に立った通知も取りこぼさないよう、起きてから消す
+            self._wake.clear()
+
+    def _over_limit(self, memo: MemoizedInfiniteSequence, computed: int) -> bool:
+        """
+        values ahead of the furthest cursor exceed the memory limit or not (最後の値の大きさで見積もる)
+        """
+        ahead: int = computed - self.furthest
+        if ahead <= 0:
+            return False
+        return ahead * (8 + sys.getsizeof(memo[computed - 1])) > self.memory_limit
+
+
+class PrefetchingStream(Stream[T]):
+    """
+    読んだ位置を Prefetcher に知らせるカーソル
+    """
+    __slots__ = ("prefetcher", "__weakref__")
+
+    def __next__(self):
+        value: T = super().__next__()
+        self.prefetcher.advance(self._current_index, len(self.values))
+        return value
+
+    def cursor(self, index: int) -> PrefetchingStream[T]:
+        """
+        new cursor sharing the prefetcher
+        """
+        view: PrefetchingStream[T] = super().cursor(index)
+        view.prefetcher = self.prefetcher
+        self.prefetcher.track(view)
+        return view
+
+
+def prefetched(stream: Stream[T], lookahead: int = 64, max_lookahead: int = 1 << 16, horizon: float = 0.05,
+               memory_limit: int = DEFAULT_MEMORY_LIMIT) -> PrefetchingStream[T]:
+    """
+    cursor at the position of stream over the same memo, kept filled ahead by a background thread
+    Args:
+        stream: stream to prefetch
+        lookahead: values computed ahead of the furthest cursor at least
+        max_lookahead: values computed ahead at most
+        horizon: seconds of consumption at the observed rate to compute ahead
+        memory_limit: bytes of values computed ahead at most
+    """
+    if lookahead < 1 or max_lookahead < lookahead:
+        raise ValueError("lookahead must satisfy 1 <= lookahead <= max_lookahead.")
+    cursor: PrefetchingStream[T] = PrefetchingStream(values=stream.values, _current_index=stream.current_index)
+    cursor.prefetcher = Prefetcher(stream.values, stream.current_index, lookahead, max_lookahead, horizon,
+                                   memory_limit)
+    cursor.prefetcher.track(cursor)
+    return cursor
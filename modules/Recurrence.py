@@ -0,0 +1,184 @@
+"""
+linear recurrence module
+
+定数係数の線形漸化式 a(n) = c1 a(n-1) + c2 a(n-2) + ... + cd a(n-d) で決まる数列 (C-finite 数列)。
+fibonacci_adding や double のように自分自身を足し合わせる再帰的なストリームの代わりに、
+各項を O(d) で順に計算し、遠くの項は Kitamasa 法で O(d^2 log n) で直接求める。
+
+    linear_recurrence([1, 1], [0, 1])   # Fibonacci numbers
+    linear_recurrence([2], [1])         # power of 2
+    linear_recurrence([2, -1], [1, 2])  # integers from 1
+"""
+from __future__ import annotations
+
+from collections import deque
+from fractions import Fraction
+from typing import TypeVar, Iterator, Sequence
+
+from modules.Series import Series, make_series
+from modules.Stream import Stream, MemoizedInfiniteSequence, copy_stream
+
+T = TypeVar("T")
+
+JUMP_THRESHOLD: int = 256  # メモの末尾からこれより遠い項は、メモを伸ばさずに直接計算する
+
+
+def _divide(a: T, b: T) -> T:
+    """
+    exact division (int if divisible, Fraction for other integers)
+    """
+    if isinstance(a, int) and isinstance(b, int):
+        return a // b if a % b == 0 else Fraction(a, b)
+    return a / b
+
+
+def linear_recurrence_generator(coefficients: Sequence[T], initial_terms: Sequence[T]) -> Iterator[T]:
+    """
+    terms of a linear recurrence, O(order) work each
+    """
+    yield from initial_terms
+    window: deque[T] = deque(initial_terms, maxlen=len(coefficients))  # window[-1] が最新の項
+    while True:
+        term: T = sum(c * a for c, a in zip(coefficients, reversed(window)))
+        window.append(term)
+        yield term
+
+
+def _multiply_modulo(p: list[T], q: list[T], coefficients: Sequence[T]) -> list[T]:
+    """
+    p(x) q(x) mod x^d - c1 x^(d-1) - ... - cd
+    """
+    order: int = len(coefficients)
+    product: list[T] = [0] * (2 * order - 1)
+    for i, pi in enumerate(p):
+        if pi:
+            for j, qj in enumerate(q):
+                product[i + j] += pi * qj
+    for k in range(2 * order - 2, order - 1, -1):
+        top: T = product[k]
+        if top:
+            for i, c in enumerate(coefficients, start=1):
+                product[k - i] += top * c
+    return product[:order]
+
+
+def kitamasa(coefficients: Sequence[T], initial_terms: Sequence[T], n: int) -> T:
+    """
+    nth term of a linear recurrence in O(order^2 log n)
+    x^n を特性多項式で割った余り r(x) を求めると a(n) = sum r_i a(i)
+    """
+    order: int = len(coefficients)
+    if n < order:
+        return initial_terms[n]
+    result: list[T] = [1] + [0] * (order - 1)
+    base: list[T] = [0, 1] + [0] * (order - 2) if order > 1 else [coefficients[0]]
+    while n > 0:
+        if n & 1:
+            result = _multiply_modulo(result, base, coefficients)
+        base = _multiply_modulo(base, base, coefficients)
+        n >>= 1
+    return sum(r * a for r, a in zip(result, initial_terms))
+
+
+class LinearRecurrenceSequence(MemoizedInfiniteSequence[T]):
+    """
+    メモ化された線形漸化数列
+    メモの末尾から遠い項はメモを伸ばさずに kitamasa で計算する
+    """
+    __slots__ = ("coefficients", "initial_terms")
+
+    def __init__(self, _iterator: Iterator[T], coefficients: tuple = (), initial_terms: tuple = ()):
+        super().__init__(_iterator)
+        self.coefficients: tuple = coefficients
+        self.initial_terms: tuple = initial_terms
+
+    def value(self, index: int) -> T:
+        """
+        インデックスに対する値
+        """
+        if index - len(self) > JUMP_THRESHOLD:
+            return kitamasa(self.coefficients, self.initial_terms, index)
+        return super().value(index)
+
+
+class LinearRecurrenceStream(Stream[T]):
+    """
+    線形漸化数列のストリーム
+    """
+    __slots__ = ()
+    values: LinearRecurrenceSequence[T]
+
+    @property
+    def coefficients(self) -> tuple:
+        """
+        (c1, ..., cd) of a(n) = c1 a(n-1) + ... + cd a(n-d)
+        """
+        return self.values.coefficients
+
+    @property
+    def initial_terms(self) -> tuple:
+        """
+        a(0), ..., a(d-1)
+        """
+        return self.values.initial_terms
+
+    @property
+    def order(self) -> int:
+        """
+        order d of the recurrence
+        """
+        return len(self.coefficients)
+
+    def generating_function(self) -> tuple[list[T], list[T]]:
+        """
+        numerator P and denominator Q = 1 - c1 x - ... - cd x^d of the generating function P(x)/Q(x)
+        """
+        denominator: list[T] = [1] + [-c for c in self.coefficients]
+        numerator: list[T] = [a - sum(self.coefficients[i - 1] * self.initial_terms[k - i] for i in range(1, k + 1))
+                              for k, a in enumerate(self.initial_terms)]
+        return numerator, denominator
+
+    def to_series(self) -> Series[T]:
+        """
+        power series whose coefficients are the terms
+        """
+        return make_series(copy_stream(self).rewound)
+
+
+def linear_recurrence(coefficients: Sequence[T], initial_terms: Sequence[T]) -> LinearRecurrenceStream[T]:
+    """
+    stream of a(n) = c1 a(n-1) + ... + cd a(n-d)
+    Args:
+        coefficients: c1, ..., cd
+        initial_terms: a(0), ..., a(d-1)
+    """
+    if len(coefficients) == 0 or len(coefficients) != len(initial_terms):
+        raise ValueError("a linear recurrence needs as many initial terms as coefficients (at least one).")
+    values: LinearRecurrenceSequence[T] = LinearRecurrenceSequence(
+        _iterator=linear_recurrence_generator(coefficients, initial_terms),
+        coefficients=tuple(coefficients), initial_terms=tuple(initial_terms))
+    return LinearRecurrenceStream(values=values)
+
+
+def from_generating_function(numerator: Sequence[T], denominator: Sequence[T]) -> LinearRecurrenceStream[T]:
+    """
+    stream of the coefficients of P(x)/Q(x) for polynomials P, Q with Q(0) != 0
+    Args:
+        numerator: coefficients of P from the 0th order
+        denominator: coefficients of Q from the 0th order
+    """
+    denominator = list(denominator)
+    while len(denominator) > 1 and denominator[-1] == 0:
+        denominator.pop()
+    if denominator[0] == 0:
+        raise ValueError("the denominator must have non-zero 0th-order term.")
+    # deg P >= deg Q のときは、漸化式の次数を deg P + 1 まで上げて係数 0 を補う
+    order: int = max(len(denominator) - 1, len(numerator), 1)
+    coefficients: list[T] = [_divide(-q, denominator[0]) for q in denominator[1:]]
+    coefficients += [0] * (order - len(coefficients))
+    initial_terms: list[T] = []
+    for k in range(order):
+        p: T = numerator[k] if k < len(numerator) else 0
+        initial_terms.append(_divide(p, denominator[0])
+                             + sum(coefficients[i - 1] * initial_terms[k - i] for i in range(1, k + 1)))
+    return linear_recurrence(coefficients, initial_terms)
@@ -0,0 +1,169 @@
+"""
+stream registry module
+
+同じ定義 (構築関数, 引数) のストリームはプロセス全体で一つのメモ化列を共有し、
+呼び出しごとに新しいカーソルを返す (hash-consing)。
+sine() * sine() のような式や、humming_stream() のように自分自身を参照する定義でも各項は一度だけ計算される。
+"""
+from __future__ import annotations
+
+import dataclasses
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from typing import TypeVar, Callable, Any, Hashable, Mapping, Optional
+
+from modules.Stream import Stream, copy_stream
+
+T = TypeVar("T")
+
+
+def _fresh_cursor(value: Any) -> Any:
+    """
+    new cursor over the memo of a registered stream or series
+    """
+    from modules.Series import Series, make_series
+    if isinstance(value, Series):
+        return make_series(copy_stream(value.coefficients))
+    if isinstance(value, Stream):
+        return copy_stream(value)
+    return value
+
+
+def _stream_of(value: Any) -> Optional[Stream]:
+    """
+    the stream holding the memo
+    """
+    if isinstance(value, Stream):
+        return value
+    return getattr(value, "coefficients", None)
+
+
+_signature: Callable[[Callable], inspect.Signature] = functools.lru_cache(maxsize=None)(inspect.signature)
+
+
+def _key(constructor: Callable, args: tuple, kwargs: dict[str, Any]) -> Hashable:
+    """
+    registry key of constructor(*args, **kwargs)
+    既定値を補って引数名で並べるので、sine(), sine(1.0), sine(one=1.0) は同じキーになる
+    (1 と 1.0 と True は等しくハッシュも同じなので、型も含める)
+    """
+    bound: inspect.BoundArguments = _signature(constructor).bind(*args, **kwargs)
+    bound.apply_defaults()
+    parameters: Mapping[str, inspect.Parameter] = bound.signature.parameters
+    typed: list[tuple] = []
+    for name, value in bound.arguments.items():
+        kind: inspect._ParameterKind = parameters[name].kind
+        if kind is inspect.Parameter.VAR_POSITIONAL:
+            typed.append((name, tuple((type(v), v) for v in value)))
+        elif kind is inspect.Parameter.VAR_KEYWORD:
+            typed.append((name, tuple(sorted((k, type(v), v) for k, v in value.items()))))
+        else:
+            typed.append((name, type(value), value))
+    return constructor.__module__, constructor.__qualname__, tuple(typed)
+
+
+def _failed(value: Any) -> bool:
+    """
+    the memo stopped with an error (同じ例外を送出し続けるので、共有し続けてはならない)
+    """
+    stream: Optional[Stream] = _stream_of(value)
+    return stream is not None and stream.values.failed
+
+
+def _memory(value: Any) -> int:
+    """
+    rough size in bytes of the memoized values (the list plus the size of the last value for each entry)
+    """
+    stream: Optional[Stream] = _stream_of(value)
+    if stream is None:
+        return 0
+    n: int = len(stream.values)
+    if n == 0:
+        return 0
+    try:
+        last: Any = stream.values[n - 1]
+    except (IndexError, StopIteration):
+        return 8 * n
+    return n * (8 + sys.getsizeof(last))
+
+
+@dataclasses.dataclass
+class StreamRegistry:
+    """
+    LRU で、メモの合計サイズが memory_budget を超えたら古いものから忘れる
+    大きさは登録や取り出しのたびに測り直すので、その間に伸びたメモは次の呼び出しで忘れられる
+    忘れたメモも、それを指すカーソルが残っている間は使える
+    """
+    max_entries: int = 1024
+    memory_budget: int = 64 * 1024 * 1024
+    _entries: OrderedDict = dataclasses.field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = dataclasses.field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def get(self, constructor: Callable[..., T], args: tuple, kwargs: dict[str, Any]) -> T:
+        """
+        fresh cursor of the canonical stream constructor(*args, **kwargs)
+        引数がハッシュできなければ登録せずに構築する
+        """
+        try:
+            key: Hashable = _key(constructor, args, kwargs)
+            hash(key)
+        except TypeError:
+            return constructor(*args, **kwargs)
+        with self._lock:
+            if key in self._entries:
+                if not _failed(self._entries[key]):
+                    self._entries.move_to_end(key)
+                    self._evict(key)
+                    return _fresh_cursor(self._entries[key])
+                del self._entries[key]  # 再帰の上限などで止まったメモは作り直す
+        value: T = constructor(*args, **kwargs)  # 構築中に他の登録済みストリームを呼ぶのでロックの外で作る
+        with self._lock:
+            value = self._entries.setdefault(key, value)
+            stream: Optional[Stream] = _stream_of(value)
+            if stream is not None:
+                stream.values._shared = True  # unmemoized がイテレータを直接消費しないように
+            self._entries.move_to_end(key)
+            self._evict(key)
+        return _fresh_cursor(value)
+
+    def _evict(self, keep: Hashable) -> None:
+        """
+        forget least recently used entries beyond the limits except keep (いま返すもの)
+        メモは登録した後に伸びるので、呼ばれるたびにすべてのメモの大きさを測り直す
+        """
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        sizes: dict[Hashable, int] = {k: _memory(v) for k, v in self._entries.items()}
+        total: int = sum(sizes.values())
+        for k, size in sizes.items():  # 古いものから
+            if total <= self.memory_budget:
+                break
+            if k != keep:
+                del self._entries[k]
+                total -= size
+
+    def clear(self) -> None:
+        """
+        forget all entries
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+default_registry: StreamRegistry = StreamRegistry()
+
+
+def canonical(constructor: Callable[..., T]) -> Callable[..., T]:
+    """
+    decorator to share the memo of streams built with the same arguments through default_registry
+    """
+    @functools.wraps(constructor)
+    def canonical_constructor(*args, **kwargs) -> T:
+        return default_registry.get(constructor, args, kwargs)
+    return canonical_constructor
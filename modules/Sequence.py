@@ -3,11 +3,13 @@ sec 3.5.2 sequence
 """
 from __future__ import annotations
 
-from itertools import repeat
-from typing import TypeVar, Iterator
+import math
+from itertools import repeat, count, chain
+from typing import TypeVar, Iterator, Optional, TextIO
 
-from modules.Math import is_divisible
-from modules.Stream import Stream, make_stream, integers_starting_from, merge, triples
+from modules.Math import is_divisible, multiplicative_order
+from modules.Registry import canonical
+from modules.Stream import Stream, MemoizedInfiniteSequence, make_stream, integers_starting_from, merge, triples
 
 T = TypeVar("T")
 
@@ -25,6 +27,7 @@ def fibonacci_generator(a: int, b: int) -> Iterator[int]:
     yield from fibonacci_generator(b, a + b)
 
 
+@canonical
 def eratosthenes_sieve() -> Stream[int]:
     """
     Eratosthenes' sieve
@@ -42,6 +45,42 @@ def eratosthenes_sieve() -> Stream[int]:
     return make_stream(sieve_generator(integers_starting_from(2)))
 
 
+def prime_generator() -> Iterator[int]:
+    """
+    incremental sieve of Eratosthenes
+    合成数は必要になる直前 (素数の2乗) から辞書に登録するので、再帰は対数の深さで済む
+    """
+    yield from (2, 3, 5, 7)
+    composites: dict[int, int] = {}  # 次の合成数 -> 刻み幅
+    base_primes: Iterator[int] = prime_generator()
+    next(base_primes)
+    p: int = next(base_primes)
+    square: int = p * p
+    for n in count(9, 2):
+        if n in composites:
+            step: int = composites.pop(n)
+        elif n < square:
+            yield n
+            continue
+        else:
+            step = 2 * p
+            p = next(base_primes)
+            square = p * p
+        multiple: int = n + step
+        while multiple in composites:
+            multiple += step
+        composites[multiple] = step
+
+
+@canonical
+def primes() -> Stream[int]:
+    """
+    primes without the recursion of eratosthenes_sieve
+    """
+    return make_stream(prime_generator())
+
+
+@canonical
 def ones() -> Stream[int]:
     """
     repeat 1s
@@ -49,6 +88,7 @@ def ones() -> Stream[int]:
     return make_stream(repeat(1))
 
 
+@canonical
 def integers_from_ones() -> Stream[int]:
     """
     integers from ones
@@ -82,6 +122,7 @@ def fibonacci_adding() -> Stream:
     return make_stream(fibonacci_inner_generator())
 
 
+@canonical
 def double() -> Stream[int]:
     """
     power of 2
@@ -95,6 +136,7 @@ def double() -> Stream[int]:
     return make_stream(double_generator())
 
 
+@canonical
 def factorial() -> Stream[int]:
     """
     exercise 3.54-2
@@ -108,6 +150,7 @@ def factorial() -> Stream[int]:
     return make_stream(factorial_generator())
 
 
+@canonical
 def humming_stream() -> Stream[int]:
     """
     exercise 3.56-2
@@ -129,6 +172,170 @@ def expand(numerator: int, denominator: int, radix: int) -> Iterator[int]:
     yield from expand((numerator * radix) % denominator, denominator, radix)
 
 
+DIGIT_CHARACTERS: str = "0123456789abcdefghijklmnopqrstuvwxyz"
+RADIX_BLOCK: int = 4096  # 一度の多倍長除算で求める桁数 (10 進の str() の桁数上限 4300 未満)
+PERIOD_CACHE_LIMIT: int = 1 << 16  # これ以下の長さの循環節は桁を保持して O(1) で引く
+
+
+def radix_digits(q: int, radix: int, k: int) -> list[int]:
+    """
+    k digits of 0 <= q < radix^k (分割統治で基数変換する)
+    """
+    if radix == 10 and k <= RADIX_BLOCK:
+        return [ord(c) - 48 for c in str(q).zfill(k)]
+    if k <= 64:
+        digits: list[int] = [0] * k
+        for i in range(k - 1, -1, -1):
+            q, digits[i] = divmod(q, radix)
+        return digits
+    half: int = k // 2
+    high, low = divmod(q, radix ** half)
+    return radix_digits(high, radix, k - half) + radix_digits(low, radix, half)
+
+
+def radix_digit_blocks(remainder: int, denominator: int, radix: int, block: int) -> Iterator[list[int]]:
+    """
+    digits of remainder/denominator (< 1) in blocks; radix^block での除算一回で block 桁を得る
+    """
+    scale: int = radix ** block
+    while True:
+        q, remainder = divmod(remainder * scale, denominator)
+        yield radix_digits(q, radix, block)
+
+
+class RadixExpansionSequence(MemoizedInfiniteSequence[int]):
+    """
+    メモ化された基数展開 (exercise 3.58 expand と同じ桁)
+    n 番目の桁は余り numerator * radix^n mod denominator から直接求まるので、遠くの桁はメモを伸ばさない
+    循環節は分母の素因数分解が要るので、cycle が求められた後で、短いときにだけ使う
+    """
+    __slots__ = ("numerator", "denominator", "radix", "_cycle", "_period_digits")
+
+    def __init__(self, _iterator: Iterator[int], numerator: int = 0, denominator: int = 1, radix: int = 10):
+        super().__init__(_iterator)
+        self.numerator: int = numerator
+        self.denominator: int = denominator
+        self.radix: int = radix
+        self._cycle: Optional[tuple[int, int]] = None
+        self._period_digits: Optional[list[int]] = None
+
+    def value(self, index: int) -> int:
+        """
+        インデックスに対する値
+        """
+        if index - len(self) <= RADIX_BLOCK:
+            return super().value(index)
+        if self._cycle is not None and self._cycle[1] <= PERIOD_CACHE_LIMIT:
+            start, period = self._cycle
+            if self._period_digits is None:
+                self._period_digits = self.digits(start, period)
+            return self._period_digits[(index - start) % period]
+        return self.digits(index, 1)[0]
+
+    @property
+    def cycle(self) -> tuple[int, int]:
+        """
+        (start, period): index n >= start の桁は周期 period で繰り返す
+        (period は乗法的位数なので、分母が大きいと素因数分解に時間がかかる)
+        """
+        if self._cycle is None:
+            reduced: int = self.denominator // math.gcd(self.numerator, self.denominator)
+            pre_period: int = 0
+            common: int = math.gcd(reduced, self.radix)
+            while common > 1:  # radix の素因数を分母から取り除いた回数が循環しない部分の長さ
+                reduced //= common
+                pre_period += 1
+                common = math.gcd(reduced, self.radix)
+            period: int = multiplicative_order(self.radix % reduced, reduced) if reduced > 1 else 1
+            self._cycle = (max(pre_period, 1), period)
+        return self._cycle
+
+    def remainder(self, index: int) -> int:
+        """
+        remainder before the digit at index (index >= 1)
+        """
+        return self.numerator * pow(self.radix, index, self.denominator) % self.denominator
+
+    def digits(self, start: int, length: int) -> list[int]:
+        """
+        digits from start (>= 1) by big-integer division in blocks
+        """
+        if start < 1:
+            return [self.value(0)] + self.digits(1, length - 1) if length > 0 else []
+        result: list[int] = []
+        for block in radix_digit_blocks(self.remainder(start), self.denominator, self.radix,
+                                        min(RADIX_BLOCK, max(length, 1))):
+            if len(result) >= length:
+                break
+            result += block
+        return result[:length]
+
+
+class RadixExpansionStream(Stream[int]):
+    """
+    基数展開のストリーム
+    """
+    __slots__ = ()
+    values: RadixExpansionSequence
+
+    @property
+    def pre_period(self) -> int:
+        """
+        index where the repetition starts
+        """
+        return self.values.cycle[0]
+
+    @property
+    def period(self) -> int:
+        """
+        length of the repeating digits
+        """
+        return self.values.cycle[1]
+
+    def to_bytes(self, start: int, length: int) -> bytes:
+        """
+        digits from start, one byte each (radix <= 256)
+        """
+        return bytes(self.values.digits(start, length))
+
+    def to_string(self, start: int, length: int) -> str:
+        """
+        digits from start as characters 0-9a-z (radix <= 36)
+        """
+        if self.values.radix > len(DIGIT_CHARACTERS):
+            raise ValueError(f"radix {self.values.radix} has no digit characters (radix <= 36).")
+        if self.values.radix == 10:
+            return self.to_bytes(start, length).translate(bytes(range(48, 58)).ljust(256, b"?")).decode("ascii")
+        return "".join(DIGIT_CHARACTERS[d] for d in self.values.digits(start, length))
+
+    def write_digits(self, file: TextIO, start: int, length: int, block: int = 1 << 20) -> None:
+        """
+        write digits from start to a text file in blocks
+        """
+        for offset in range(start, start + length, block):
+            file.write(self.to_string(offset, min(block, start + length - offset)))
+
+
+def radix_expansion(numerator: int, denominator: int, radix: int) -> RadixExpansionStream:
+    """
+    exercise 3.58 の expand を、再帰せずブロック単位で行うストリーム
+    Args:
+        numerator: 0 <= numerator < denominator (各桁が radix 未満になる真分数)
+        denominator: positive
+        radix: radix >= 2
+    """
+    if radix < 2:
+        raise ValueError("radix must be at least 2.")
+    if not 0 <= numerator < denominator:
+        raise ValueError("radix_expansion needs 0 <= numerator < denominator.")
+    first, remainder = divmod(numerator * radix, denominator)
+    blocks: Iterator[list[int]] = radix_digit_blocks(remainder, denominator, radix, RADIX_BLOCK)
+    values: RadixExpansionSequence = RadixExpansionSequence(
+        _iterator=chain([first], chain.from_iterable(blocks)),
+        numerator=numerator, denominator=denominator, radix=radix)
+    return RadixExpansionStream(values=values)
+
+
 def pythagorean_triples() -> Stream[tuple[int, int, int]]:
     """
     exercise 3.69: Pythagorean triples
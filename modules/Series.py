@@ -4,13 +4,171 @@ stream module
 from __future__ import annotations
 
 import dataclasses
-from itertools import chain, repeat
-from typing import TypeVar, Iterator, Generic
-
-from modules.Stream import make_stream, Stream
+import decimal
+import math
+import numbers
+import sys
+import warnings
+from itertools import repeat, count, islice
+from typing import TypeVar, Iterator, Generic, Optional, Any, Callable, Sequence
+
+from modules.Backend import numpy_backend
+from modules.Registry import canonical
+from modules.Stream import make_stream, Stream, MemoizedInfiniteSequence
 
 T = TypeVar("T")
 
+DEFAULT_MAX_TERMS: int = 100  # evaluate で tol を満たすまでに使う項数の上限
+
+
+class ConvergenceWarning(RuntimeWarning):
+    """
+    Series.evaluate did not reach the tolerance within the number of terms
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class Support:
+    """
+    orders start, start + stride, start + 2 stride, ... (up to degree) where coefficients can be non-zero
+    stride 0 は start 一つだけ、degree < start は係数がすべて 0
+    """
+    start: int = 0
+    stride: int = 1
+    degree: Optional[int] = None  # None: 無限に続く
+
+    def __contains__(self, order: int) -> bool:
+        if order < self.start or (self.degree is not None and order > self.degree):
+            return False
+        return order == self.start if self.stride == 0 else (order - self.start) % self.stride == 0
+
+    @property
+    def empty(self) -> bool:
+        """
+        all coefficients are zero
+        """
+        return self.degree is not None and self.degree < self.start
+
+    def position(self, order: int) -> int:
+        """
+        index of an order in the support
+        """
+        return 0 if self.stride == 0 else (order - self.start) // self.stride
+
+    def size(self) -> Optional[int]:
+        """
+        number of orders in the support (None if infinite)
+        """
+        if self.degree is None:
+            return None
+        if self.empty:
+            return 0
+        return 1 if self.stride == 0 else (self.degree - self.start) // self.stride + 1
+
+    def orders(self) -> Iterator[int]:
+        """
+        orders in the support in increasing order
+        """
+        if self.empty:
+            return iter(())
+        if self.stride == 0:
+            return iter((self.start,))
+        if self.degree is None:
+            return count(self.start, self.stride)
+        return iter(range(self.start, self.degree + 1, self.stride))
+
+    def orders_down_from(self, order: int) -> range:
+        """
+        orders in the support up to order, in decreasing order
+        """
+        last: int = order if self.degree is None else min(order, self.degree)
+        if self.empty or last < self.start:
+            return range(0)
+        if self.stride == 0:
+            return range(self.start, self.start - 1, -1)
+        return range(last - (last - self.start) % self.stride, self.start - 1, -self.stride)
+
+    def union(self, other: Support) -> Support:
+        """
+        support of a sum
+        """
+        if self.empty:
+            return other
+        if other.empty:
+            return self
+        degree: Optional[int] = None if self.degree is None or other.degree is None else max(self.degree, other.degree)
+        return Support(min(self.start, other.start),
+                       math.gcd(self.stride, other.stride, abs(self.start - other.start)), degree)
+
+    def sumset(self, other: Support) -> Support:
+        """
+        support of a product
+        """
+        if self.empty or other.empty:
+            return Support(0, 0, -1)
+        degree: Optional[int] = None if self.degree is None or other.degree is None else self.degree + other.degree
+        return Support(self.start + other.start, math.gcd(self.stride, other.stride), degree)
+
+    def reciprocal(self) -> Support:
+        """
+        support of 1/s for s with non-zero 0th-order term (s(x) = f(x^stride) なら 1/s も x^stride の級数)
+        """
+        return Support(0, 0, 0) if self.degree == 0 else Support(0, self.stride, None)
+
+    @staticmethod
+    def of_polynomial(coefficients: Sequence[T]) -> Support:
+        """
+        smallest support of a polynomial
+        """
+        orders: list[int] = [k for k, c in enumerate(coefficients) if c != 0]
+        if not orders:
+            return Support(0, 0, -1)
+        return Support(orders[0], math.gcd(*(k - orders[0] for k in orders)), orders[-1])
+
+
+class StructuredSequence(MemoizedInfiniteSequence[T]):
+    """
+    係数が 0 と分かっている次数を持つ係数列のメモ
+    support の外の係数は計算もメモもせずに zero を返し、support の中の係数だけを順にメモする
+    """
+    __slots__ = ("support", "zero")
+
+    def __init__(self, _iterator: Iterator[T], support: Support, zero: T):
+        super().__init__(_iterator)  # support の次数の係数だけを順に返す
+        self.support: Support = support
+        self.zero: T = zero
+
+    def __len__(self) -> int:
+        computed: int = super().__len__()
+        size: Optional[int] = self.support.size()
+        if size is not None and computed >= size:
+            return self.support.degree + 1
+        return self.support.start + self.support.stride * computed
+
+    def value(self, index: int) -> T:
+        """
+        インデックス (次数) に対する値
+        """
+        if index not in self.support:
+            return self.zero
+        try:
+            return super().value(self.support.position(index))
+        except StopIteration:  # 有限の多項式
+            return self.zero
+
+    def uncomputed(self) -> Iterator[T]:
+        """
+        coefficients after the computed ones, with the zeros outside the support
+        """
+        order: int = len(self)
+        for v in self._iterator:
+            yield v
+            order += 1
+            while order not in self.support and (self.support.degree is None or order <= self.support.degree):
+                yield self.zero
+                order += 1
+        yield from repeat(self.zero)
+
 
 @dataclasses.dataclass
 class Series(Generic[T]):
@@ -31,6 +189,8 @@ class Series(Generic[T]):
     def __mul__(self, other) -> Series[T]:
         if isinstance(other, self.__class__):
             return multiply_2series(self, other)
+        if self.support is not None:
+            return _structured_series(self.support, self.zero * abs(other), lambda k: self.nth(k) * other)
         return make_series(self.coefficients * other)
 
     def __add__(self, other) -> Series[T]:
@@ -39,6 +199,8 @@ class Series(Generic[T]):
         return add_2series(self, other)
 
     def __neg__(self) -> Series[T]:
+        if self.support is not None:
+            return _structured_series(self.support, self.zero, lambda k: -self.nth(k))
         return make_series(-self.coefficients)
 
     def __sub__(self, other) -> Series[T]:
@@ -49,7 +211,7 @@ class Series(Generic[T]):
     def __truediv__(self, other) -> Series[T]:
         if isinstance(other, self.__class__):
             return divide_series(self, other)
-        return make_series(self.coefficients * (1.0 / other))
+        return self * (1 / other)
 
     def nth(self, n: int) -> T:
         """
@@ -57,6 +219,23 @@ class Series(Generic[T]):
         """
         return self.coefficients.nth(n)
 
+    @property
+    def support(self) -> Optional[Support]:
+        """
+        known support of the coefficients from the cursor at the 0th order (None if unknown)
+        """
+        values: MemoizedInfiniteSequence[T] = self.coefficients.values
+        if isinstance(values, StructuredSequence) and self.coefficients.current_index == 0:
+            return values.support
+        return None
+
+    @property
+    def zero(self) -> T:
+        """
+        zero of the coefficient ring for a series with known support
+        """
+        return self.coefficients.values.zero
+
     @property
     def from_0th(self) -> Series[T]:
         """
@@ -64,6 +243,75 @@ class Series(Generic[T]):
         """
         return make_series(self.coefficients.rewound)
 
+    def __pow__(self, exponent) -> Series[T]:
+        return power_series(self, exponent)
+
+    def compose(self, other: Series[T]) -> Series[T]:
+        """
+        self(other(x)); other must have zero 0th-order term
+        """
+        return compose_series(self, other)
+
+    def revert(self) -> Series[T]:
+        """
+        compositional inverse g with self(g(x)) = x
+        """
+        return revert_series(self)
+
+    def log(self) -> Series[T]:
+        """
+        logarithm
+        """
+        return log_series(self)
+
+    def exp(self) -> Series[T]:
+        """
+        exponential
+        """
+        return exp_series(self)
+
+    def sqrt(self) -> Series[T]:
+        """
+        square root
+        """
+        return sqrt_series(self)
+
+    def pow(self, exponent) -> Series[T]:
+        """
+        power
+        """
+        return power_series(self, exponent)
+
+    def evaluate(self, x: Any, terms: Optional[int] = None, tol: Optional[float] = None) -> tuple[Any, Any]:
+        """
+        value of the power series at x by Horner's method
+        Args:
+            x: a point (int, float, complex, Fraction, Decimal, ...), or a NumPy array (or list) of points
+            terms: number of terms (the upper limit if tol is given)
+            tol: absolute error to stop at; the number of terms is chosen per point
+        Returns:
+            values and error estimates, in the shape of x
+            誤差は残りの項を等比級数で抑えた |a_n x^n| / (1 - r) で見積もり、r >= 1 なら inf とする
+            tol を満たさない点があれば ConvergenceWarning を出す
+        """
+        if terms is None:
+            terms = DEFAULT_MAX_TERMS
+            if tol is None:
+                tol = sys.float_info.epsilon
+        buffer: list[T] = coefficient_buffer(self, terms + 2)
+        numpy = numpy_backend()
+        if isinstance(x, (list, tuple)):  # NumPy の有無によらずリストで返す
+            if numpy is not None:
+                values, errors = _evaluate_array(numpy, buffer, numpy.asarray(x), terms, tol)
+                return values.tolist(), errors.tolist()
+            evaluated: list[tuple[Any, Any]] = [_evaluate_point(buffer, v, terms, tol) for v in x]
+            return [v for v, _ in evaluated], [e for _, e in evaluated]
+        if numpy is not None and not isinstance(x, numbers.Number) and numpy.ndim(x) > 0:  # Fraction なども一点
+            return _evaluate_array(numpy, buffer, numpy.asarray(x), terms, tol)
+        if isinstance(x, decimal.Decimal):  # float と Decimal は掛けられないので、係数を Decimal にする
+            buffer = [_decimal(a) for a in buffer]
+        return _evaluate_point(buffer, x, terms, tol)
+
 
 def make_series(coefficient_stream: Stream[T]) -> Series[T]:
     """
@@ -72,18 +320,142 @@ def make_series(coefficient_stream: Stream[T]) -> Series[T]:
     return Series(coefficients=coefficient_stream)
 
 
-def integrated_coefficients(integration_constant: float, s: Iterator[float]) -> Stream[float]:
+def _structured_series(support: Support, zero: T, coefficient: Callable[[int], T]) -> Series[T]:
+    """
+    series whose coefficients are coefficient(k) for the orders k in support and zero elsewhere
+    """
+    return make_series(Stream(values=StructuredSequence(map(coefficient, support.orders()), support, zero)))
+
+
+def polynomial(coefficients: Sequence[T]) -> Series[T]:
+    """
+    finite series; 0 でない係数だけをメモし、演算でも 0 の項を飛ばす
+    Args:
+        coefficients: coefficients from the 0th order
+    """
+    coefficients = list(coefficients)
+    support: Support = Support.of_polynomial(coefficients)
+    zero: T = coefficients[0] * 0 if coefficients else 0.0
+    return _structured_series(support, zero, coefficients.__getitem__)
+
+
+def coefficient_buffer(s: Series[T], n: int) -> list[T]:
+    """
+    coefficients of order 0 to n-1 from the memo (0 after the end of a finite stream)
+    """
+    buffer: list[T] = []
+    try:
+        for k in range(n):
+            buffer.append(s.nth(k))
+    except StopIteration:
+        buffer += [0.0] * (n - len(buffer))
+    return buffer
+
+
+def _decimal(a: Any) -> decimal.Decimal:
+    """
+    coefficient as a Decimal (Fraction は分子と分母を割る)
+    """
+    if isinstance(a, (int, float, decimal.Decimal)):
+        return decimal.Decimal(a)
+    if isinstance(a, numbers.Rational):
+        return decimal.Decimal(a.numerator) / decimal.Decimal(a.denominator)
+    raise TypeError(f"cannot evaluate {type(a).__name__} coefficients at a Decimal point")
+
+
+def _tail_bound(magnitudes: list[Any], n: int) -> Any:
+    """
+    bound of sum_{k >= n} |a_k x^k| as a geometric series: s_n / (1 - r), r = s_n / s_{n-2}
+    s_k = |a_k x^k| + |a_{k+1} x^{k+1}| のように 2 項ずつまとめる (偶関数・奇関数の 0 係数を飛ばすため)
+    """
+    following: Any = magnitudes[n] + magnitudes[n + 1]
+    if not following:
+        return following
+    previous: Any = magnitudes[n - 2] + magnitudes[n - 1] if n >= 2 else 0
+    if not following < previous:  # 比が 1 以上 (または分からない) なら残りは抑えられない
+        return math.inf
+    return following / (1 - following / previous)
+
+
+def _evaluate_point(buffer: list[T], x: Any, terms: int, tol: Optional[float]) -> tuple[Any, Any]:
+    """
+    Series.evaluate at a point
+    """
+    magnitudes: list[Any] = []
+    power: Any = 1  # 係数環と x の型のまま計算する (Fraction なら厳密に)
+    for a in buffer:
+        magnitudes.append(abs(a * power))
+        power *= x
+    n: int = terms
+    if tol is not None:
+        n = next((k for k in range(2, terms) if _tail_bound(magnitudes, k) <= tol), terms)
+    error: Any = _tail_bound(magnitudes, n)
+    if tol is not None and not error <= tol:
+        warnings.warn(f"evaluate at {x} did not reach tol={tol} within {terms} terms (error {error})",
+                      ConvergenceWarning, stacklevel=3)
+    value: Any = buffer[0] * 0
+    for a in reversed(buffer[:n]):
+        value = value * x + a
+    return value, error
+
+
+def _evaluate_array(numpy, buffer: list[T], x, terms: int, tol: Optional[float]) -> tuple[Any, Any]:
+    """
+    Series.evaluate at an array of points
+    各点の項数を前進で決めてから、項数より高次の係数を捨てる Horner 法を全点まとめて行う
+    """
+    coefficients = numpy.asarray(buffer, dtype=numpy.result_type(float, x))
+    magnitude_of_x = numpy.abs(x)
+    magnitudes: list = [numpy.abs(coefficients[0]) * numpy.ones(x.shape)]  # |a_k x^k| の直近 4 つ
+    power = numpy.ones(x.shape)
+    for k in range(1, min(4, terms + 2)):
+        power = power * magnitude_of_x
+        magnitudes.append(numpy.abs(coefficients[k]) * power)
+    n = numpy.full(x.shape, terms)
+    error = numpy.full(x.shape, numpy.inf)
+    pending = numpy.ones(x.shape, dtype=bool)  # まだ項数の決まらない点
+    with numpy.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for k in range(2, terms + 1):
+            previous = magnitudes[-4] + magnitudes[-3]
+            following = magnitudes[-2] + magnitudes[-1]
+            bound = numpy.where(following == 0.0, 0.0,
+                                numpy.where(following < previous, following / (1.0 - following / previous),
+                                            numpy.inf))
+            if k == terms:
+                error = numpy.where(pending, bound, error)
+            elif tol is not None:
+                stop = pending & (bound <= tol)
+                n = numpy.where(stop, k, n)
+                error = numpy.where(stop, bound, error)
+                pending &= ~stop
+                if not pending.any():
+                    break
+            if k < terms:
+                power = power * magnitude_of_x
+                magnitudes = magnitudes[1:] + [numpy.abs(coefficients[k + 2]) * power]
+    if tol is not None:
+        missed: int = int(numpy.count_nonzero(~(error <= tol)))
+        if missed:
+            warnings.warn(f"evaluate at {missed} of {x.size} points did not reach tol={tol} within {terms} terms",
+                          ConvergenceWarning, stacklevel=3)
+    value = numpy.zeros(x.shape, dtype=coefficients.dtype)
+    for k in range(int(n.max(initial=0)) - 1, -1, -1):
+        value = numpy.where(k < n, value * x + coefficients[k], value)
+    return value, error
+
+
+def integrated_coefficients(integration_constant: T, s: Iterator[T]) -> Stream[T]:
     """
     exercise 3.59a
     """
-    def integration_generator() -> Iterator[float]:
+    def integration_generator() -> Iterator[T]:
         """
         integration
         """
         yield integration_constant
-        factor_inverse: float = 0.0
+        factor_inverse: int = 0  # 整数で割り、係数の型 (float, Fraction) を保つ
         while True:
-            factor_inverse += 1.0
+            factor_inverse += 1
             yield next(iter(s)) / factor_inverse
     return make_stream(integration_generator())
 
@@ -95,48 +467,62 @@ def negate_series(s: Series[float]) -> Series[float]:
     return make_series(s.coefficients * (-1.0))
 
 
-def exponential() -> Series[float]:
+@canonical
+def exponential(one: T = 1.0) -> Series[T]:
     """
     exercise 3.59b-1
+    Args:
+        one: unit of the coefficient ring (1.0, Fraction(1), ...)
     """
-    def exp_generator() -> Iterator[float]:
+    def exp_generator() -> Iterator[T]:
         """
         exponential
         """
         yield from integrated_coefficients(integration_constant, exp_generator())
 
-    integration_constant: float = 1.0
+    integration_constant: T = one
     return make_series(make_stream(exp_generator()))
 
 
-def sine() -> Series[float]:
+@canonical
+def sine(one: T = 1.0) -> Series[T]:
     """
-    exercise 3.59b-2
+    exercise 3.59b-2 (奇数次の係数だけをメモする)
+    Args:
+        one: unit of the coefficient ring
     """
-    def sine_generator() -> Iterator[float]:
+    def sine_generator() -> Iterator[T]:
         """
         sine
         """
-        yield from integrated_coefficients(0.0, (integrated_coefficients(1.0, -sine())))
-    return make_series(make_stream(sine_generator()))
+        yield from integrated_coefficients(one - one, (integrated_coefficients(one, -sine(one))))
+    return make_series(Stream(values=StructuredSequence(islice(sine_generator(), 1, None, 2), Support(1, 2),
+                                                        one - one)))
 
 
-def cosine() -> Series[float]:
+@canonical
+def cosine(one: T = 1.0) -> Series[T]:
     """
-    exercise 3.59b-2
+    exercise 3.59b-2 (偶数次の係数だけをメモする)
+    Args:
+        one: unit of the coefficient ring
     """
-    def cosine_generator() -> Iterator[float]:
+    def cosine_generator() -> Iterator[T]:
         """
         cosine
         """
-        yield from integrated_coefficients(1.0, (integrated_coefficients(0.0, -cosine())))
-    return make_series(make_stream(cosine_generator()))
+        yield from integrated_coefficients(one, (integrated_coefficients(one - one, -cosine(one))))
+    return make_series(Stream(values=StructuredSequence(islice(cosine_generator(), 0, None, 2), Support(0, 2),
+                                                        one - one)))
 
 
 def add_2series(s1: Series[T], s2: Series[T]) -> Series[T]:
     """
     add 2 series
     """
+    if s1.support is not None and s2.support is not None:
+        return _structured_series(s1.support.union(s2.support), s1.zero + s2.zero,
+                                  lambda k: s1.nth(k) + s2.nth(k))
     return make_series(s1.coefficients + s2.coefficients)
 
 
@@ -149,10 +535,27 @@ def add_series(*series) -> Stream[T]:
     return add_series(series[0], add_series(*series[1:]))
 
 
+def _convolution(s0: Series[T], s1: Series[T], k: int, zero: T) -> T:
+    """
+    kth coefficient of s0 s1 over the non-zero terms only
+    multiply_2series と同じく s1[k-i] s0[i] を i の大きい方から足し込む (丸め誤差も同じになる)
+    """
+    total: Optional[T] = None
+    for i in s0.support.orders_down_from(k):
+        if k - i in s1.support:
+            term: T = s1.nth(k - i) * s0.nth(i)
+            total = term if total is None else term + total
+    return zero if total is None else total
+
+
 def multiply_2series(s0: Series[float], s1: Series[float]) -> Series[float]:
     """
     exercise 3.60
     """
+    if s0.support is not None and s1.support is not None:
+        return _structured_series(s0.support.sumset(s1.support), s0.zero * s1.zero,
+                                  lambda k: _convolution(s0, s1, k, s0.zero * s1.zero))
+
     def multiply_generator() -> Iterator[float]:
         """
         multiplication
@@ -178,43 +581,296 @@ def inverted_unit_series(s: Series[float]) -> Series[float]:
     """
     exercise 3.61-1
     """
+    if s.support is not None and s.support.start == 0 and not s.support.empty:
+        return _structured_inverse(s)
+
     def inversion_generator() -> Iterator[float]:
         """
         inversion
         """
         _first: float = next(iter(s))  # = 1.0
-        yield 1.0
+        yield _first ** 0  # 係数と同じ型の 1
         yield from -s * inverted_unit_series(s.from_0th)
     return make_series(make_stream(inversion_generator()))
 
 
+def _structured_inverse(s: Series[T]) -> Series[T]:
+    """
+    inverted_unit_series for a series with known support
+    X = 1 - s' X (s' = (s - 1)/x) の k 次の係数を、s' X の 0 でない項だけで inverted_unit_series と同じ順に足す
+    """
+    def coefficient(k: int) -> T:
+        """
+        kth coefficient
+        """
+        if k == 0:
+            return s.nth(0) ** 0
+        total: Optional[T] = None
+        for j in s.support.orders_down_from(k):
+            if j > 0 and k - j in support:
+                term: T = inverse.nth(k - j) * (-s.nth(j))
+                total = term if total is None else term + total
+        return s.zero if total is None else total
+
+    support: Support = s.support.reciprocal()
+    inverse: Series[T] = _structured_series(support, s.zero, coefficient)
+    return inverse
+
+
 def divide_series(numerator: Series[float], denominator: Series[float]) -> Series[float]:
     """
     exercise 3.61-2
     """
-    denominator_first_coefficient: float = next(iter(denominator))
+    if denominator.support is not None:
+        denominator_first_coefficient: float = denominator.nth(0)
+    else:
+        denominator_first_coefficient = next(iter(denominator))
     if denominator_first_coefficient == 0.0:
         raise ValueError("division must be done by the series with non-zero 0th-order term.")
     return ((numerator / denominator_first_coefficient)
             * inverted_unit_series(denominator.from_0th / denominator_first_coefficient))
 
 
+@canonical
 def constant_series(constant: float) -> Series[float]:
     """
     constant
     """
-    return make_series(make_stream(chain([constant], repeat(0.0))))
+    return polynomial([constant])
 
 
-def tangent() -> Series[float]:
+@canonical
+def tangent(one: T = 1.0) -> Series[T]:
     """
     exercise 3.61-3
+    Args:
+        one: unit of the coefficient ring
     """
-    return sine() / cosine()
+    return sine(one) / cosine(one)
 
 
-def secant() -> Series[float]:
+@canonical
+def secant(one: T = 1.0) -> Series[T]:
     """
     exercise 3.61-3
+    Args:
+        one: unit of the coefficient ring
+    """
+    return inverted_unit_series(cosine(one))
+
+
+# 以下は係数を密なリストに取り出して、ニュートン法で正しい係数の数を 1 ステップごとに倍にする。
+# n 個の係数にかかる手間は、長さ n の積の数回分になる。
+
+def _product(a: list[T], b: list[T], n: int) -> list[T]:
+    """
+    a(x) b(x) mod x^n
+    """
+    product: list[T] = [a[0] * 0] * n
+    for i, ai in enumerate(a[:n]):
+        if ai:
+            for j, bj in enumerate(b[:n - i]):
+                product[i + j] += ai * bj
+    return product
+
+
+def _derivative(a: list[T]) -> list[T]:
+    return [k * a[k] for k in range(1, len(a))]
+
+
+def _integral(a: list[T], constant: T) -> list[T]:
+    return [constant] + [ak / k for k, ak in enumerate(a, start=1)]
+
+
+def _reciprocal(a: list[T], n: int) -> list[T]:
+    """
+    1/a(x) mod x^n: g <- g (2 - a g)
+    """
+    if a[0] == 0:
+        raise ValueError("reciprocal needs a non-zero 0th-order term.")
+    g: list[T] = [1 / a[0]]
+    while len(g) < n:
+        m: int = min(2 * len(g), n)
+        correction: list[T] = [-v for v in _product(a, g, m)]
+        correction[0] += 2
+        g = _product(g, correction, m)
+    return g
+
+
+def _log(a: list[T], n: int) -> list[T]:
+    """
+    log a(x) mod x^n = integral of a'/a
+    """
+    if a[0] == 1:
+        return _integral(_product(_derivative(a), _reciprocal(a, n), n - 1), a[0] * 0)
+    if isinstance(a[0], float) and a[0] > 0.0:
+        logarithm: list[T] = _log([ak / a[0] for ak in a], n)
+        logarithm[0] = math.log(a[0])
+        return logarithm
+    raise ValueError("log needs the 0th-order term 1 (or a positive float).")
+
+
+def _exp(a: list[T], n: int) -> list[T]:
+    """
+    exp a(x) mod x^n: g <- g (1 - log g + a)
+    """
+    if a[0] != 0:
+        if not isinstance(a[0], float):
+            raise ValueError("exp needs the 0th-order term 0 (or a float).")
+        return [math.exp(a[0]) * v for v in _exp([0.0] + a[1:], n)]
+    zero: T = a[0]
+    g: list[T] = [zero ** 0]
+    while len(g) < n:
+        m: int = min(2 * len(g), n)
+        correction: list[T] = [ak - lk for ak, lk in zip(a[:m] + [zero] * (m - len(a)),
+                                                         _log(g + [zero] * (m - len(g)), m))]
+        correction[0] += 1
+        g = _product(g, correction, m)
+    return g
+
+
+def _sqrt(a: list[T], n: int) -> list[T]:
+    """
+    sqrt a(x) mod x^n: g <- (g + a/g) / 2
+    """
+    if a[0] == 1:
+        g: list[T] = [a[0]]
+    elif isinstance(a[0], float) and a[0] > 0.0:
+        g = [math.sqrt(a[0])]
+    else:
+        raise ValueError("sqrt needs the 0th-order term 1 (or a positive float).")
+    while len(g) < n:
+        m: int = min(2 * len(g), n)
+        quotient: list[T] = _product(a, _reciprocal(g, m), m)
+        g = [(gk + qk) / 2 for gk, qk in zip(g + [g[0] * 0] * (m - len(g)), quotient)]
+    return g
+
+
+def _power(a: list[T], exponent, n: int) -> list[T]:
+    """
+    a(x)^exponent mod x^n (binary powering for non-negative integers, exp(exponent log a) otherwise)
+    """
+    if isinstance(exponent, int) and exponent >= 0:
+        result: list[T] = [a[0] ** 0] + [a[0] * 0] * (n - 1)
+        base: list[T] = a[:n]
+        while exponent > 0:
+            if exponent & 1:
+                result = _product(result, base, n)
+            base = _product(base, base, n)
+            exponent >>= 1
+        return result
+    if isinstance(exponent, int):
+        return _reciprocal(_power(a, -exponent, n), n)
+    return _exp([exponent * v for v in _log(a, n)], n)
+
+
+def _compose(f: list[T], g: list[T], n: int) -> list[T]:
+    """
+    f(g(x)) mod x^n (g(0) = 0) by the baby-step giant-step method of Brent and Kung
+    f を m ~ sqrt(n) 項ずつの塊 B_j に分けて f(y) = sum B_j(y) (y^m)^j とし、
+    B_j(g) は g^0, ..., g^(m-1) の線形結合で、外側は g^m についての Horner 法で求める
+    (打ち切った積は n 回でなく 2 sqrt(n) 回ほどで済む)
+    """
+    if g[0] != 0:
+        raise ValueError("composition needs the inner series with zero 0th-order term.")
+    zero: T = f[0] * 0
+    m: int = math.isqrt(n - 1) + 1  # ceil(sqrt(n))
+    powers: list[list[T]] = [[zero ** 0] + [zero] * (n - 1)]  # baby steps g^i (i < m)
+    for _ in range(1, m):
+        powers.append(_product(g, powers[-1], n))
+    giant: list[T] = _product(g, powers[-1], n)  # g^m
+
+    def block(j: int) -> list[T]:
+        """
+        B_j(g) mod x^n (g^i の i 次未満の係数は 0)
+        """
+        combination: list[T] = [zero] * n
+        for i, c in enumerate(f[j * m:min((j + 1) * m, n)]):
+            if c:
+                for k in range(i, n):
+                    combination[k] += c * powers[i][k]
+        return combination
+
+    j: int = (n - 1) // m
+    result: list[T] = block(j)
+    for j in range(j - 1, -1, -1):
+        result = [r + b for r, b in zip(_product(giant, result, n), block(j))]
+    return result
+
+
+def _revert(f: list[T], n: int) -> list[T]:
+    """
+    g with f(g(x)) = x mod x^n: g <- g - (f(g) - x) / f'(g)
+    """
+    if f[0] != 0 or f[1] == 0:
+        raise ValueError("reversion needs zero 0th-order term and non-zero 1st-order term.")
+    derivative: list[T] = _derivative(f)
+    g: list[T] = [f[0], 1 / f[1]]
+    while len(g) < n:
+        m: int = min(2 * len(g), n)
+        g = g + [f[0] * 0] * (m - len(g))
+        residual: list[T] = _compose(f, g, m)
+        residual[1] -= 1
+        step: list[T] = _product(residual, _reciprocal(_compose(derivative + [f[0] * 0], g, m), m), m)
+        g = [gk - sk for gk, sk in zip(g, step)]
+    return g[:max(n, 1)]
+
+
+def _newton_series(compute: Callable[[int], list[T]]) -> Series[T]:
+    """
+    series whose first n coefficients are compute(n); n is doubled when more are read
+    """
+    def newton_generator() -> Iterator[T]:
+        """
+        coefficients
+        """
+        n: int = 8
+        buffer: list[T] = compute(n)
+        for k in count():
+            if k >= n:
+                n *= 2
+                buffer = compute(n)
+            yield buffer[k]
+    return make_series(make_stream(newton_generator()))
+
+
+def compose_series(f: Series[T], g: Series[T]) -> Series[T]:
+    """
+    f(g(x)) for g with zero 0th-order term
+    """
+    return _newton_series(lambda n: _compose(coefficient_buffer(f, n), coefficient_buffer(g, n), n))
+
+
+def revert_series(f: Series[T]) -> Series[T]:
+    """
+    compositional inverse of f (f(0) = 0, f'(0) != 0)
+    """
+    return _newton_series(lambda n: _revert(coefficient_buffer(f, n), n))
+
+
+def log_series(s: Series[T]) -> Series[T]:
+    """
+    logarithm
+    """
+    return _newton_series(lambda n: _log(coefficient_buffer(s, n), n))
+
+
+def exp_series(s: Series[T]) -> Series[T]:
+    """
+    exponential
+    """
+    return _newton_series(lambda n: _exp(coefficient_buffer(s, n), n))
+
+
+def sqrt_series(s: Series[T]) -> Series[T]:
+    """
+    square root
+    """
+    return _newton_series(lambda n: _sqrt(coefficient_buffer(s, n), n))
+
+
+def power_series(s: Series[T], exponent) -> Series[T]:
+    """
+    s^exponent
     """
-    return inverted_unit_series(cosine())
+    return _newton_series(lambda n: _power(coefficient_buffer(s, n), exponent, n))
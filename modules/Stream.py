@@ -3,73 +3,234 @@ stream module
 """
 from __future__ import annotations
 
-import dataclasses
+import threading
+from contextlib import contextmanager
 from itertools import count, accumulate, chain, islice
-from typing import TypeVar, Iterator, Generic
+from typing import TypeVar, Iterator, Generic, Optional
 
 S = TypeVar("S")
 T = TypeVar("T")
 U = TypeVar("U")
 
 
-@dataclasses.dataclass
+LOCK_STRIPES: int = 64  # ストリームごとにロックを持たず、id で選んだ共有のロックを使う
+_memo_locks: tuple[threading.Lock, ...] = tuple(threading.Lock() for _ in range(LOCK_STRIPES))
+_memo_conditions: tuple[threading.Condition, ...] = tuple(map(threading.Condition, _memo_locks))
+_cursor_locks: tuple[threading.Lock, ...] = tuple(threading.Lock() for _ in range(LOCK_STRIPES))
+
+
+def _stripe(instance: object) -> int:
+    """
+    index of the shared lock for an object (オブジェクトは 16 バイト境界に置かれる)
+    """
+    return (id(instance) >> 4) % LOCK_STRIPES
+
+
 class MemoizedInfiniteSequence(Generic[T]):
     """
     メモ化された無限リスト
+
+    計算済みのインデックスはロックなしで読み出す。
+    未計算のインデックスはただ一つのスレッドが生成を担い、他のスレッドは条件変数で待つ。
+    ロックと条件変数は同じストライプのメモで共有し、メモ自身はスロットだけを持つ。
     """
-    _iterator: Iterator[T]
-    __memo: list[T] = dataclasses.field(default_factory=list)
+    __slots__ = ("_iterator", "__memo", "_offset", "_producer", "_exhausted", "_error", "_waiting", "_shared",
+                 "__weakref__")
+
+    def __init__(self, _iterator: Iterator[T], _offset: int = 0):
+        self._iterator: Iterator[T] = _iterator
+        self.__memo: list[T] = []
+        self._offset: int = _offset  # __memo[0] のインデックス (チェックポイントから再開したとき、それ以前の値は持たない)
+        self._producer: Optional[int] = None  # 生成中のスレッド
+        self._exhausted: bool = False
+        self._error: Optional[Exception] = None  # イテレータが送出した例外 (以後の読み手にも同じ例外を送出する)
+        self._waiting: int = 0  # 条件変数で待っているスレッドの数
+        self._shared: bool = False  # レジストリに登録され、プロセス全体で共有されている
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(_iterator={self._iterator!r}, _offset={self._offset}, computed={len(self)})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self._iterator, self.__memo, self._offset) == (other._iterator, other.__memo, other._offset)
+
+    __hash__ = None
 
     def __getitem__(self, item):
         return self.value(item)
 
+    def __len__(self) -> int:
+        return self._offset + len(self.__memo)
+
     def value(self, index: int) -> T:
         """
         インデックスに対する値
         """
-        if index < len(self.__memo):
-            return self.__memo[index]
+        memo: list[T] = self.__memo
+        position: int = index - self._offset
+        if position < len(memo):
+            if position < 0:
+                raise IndexError(f"value at {index} was discarded before index {self._offset}")
+            return memo[position]
+        stripe: int = _stripe(self)
+        lock: threading.Lock = _memo_locks[stripe]
+        with lock:
+            while position >= len(memo):
+                if self._exhausted:
+                    raise StopIteration
+                if self._error is not None:
+                    raise self._error
+                if self._producer is None:
+                    break
+                if self._producer == threading.get_ident():
+                    raise ValueError("memoized sequence refers to its own unevaluated element")
+                self.__wait(stripe)
+            else:
+                return memo[position]
+            self._producer = threading.get_ident()
         try:
-            self.__memo += list(islice(self._iterator, index - len(self.__memo) + 1))
-        except (StopIteration, RuntimeError):
-            raise StopIteration
-        return self.value(index)
+            if position == len(memo):  # 順に読むときは一つずつ伸ばす
+                memo.append(next(self._iterator))
+            else:
+                self.__extend(position)
+        except StopIteration:
+            self._exhausted = True
+        except RuntimeError as error:
+            if not isinstance(error.__cause__, StopIteration):  # 再帰の上限などは終端ではない
+                self._error = error
+                raise
+            self._exhausted = True  # 生成器の中で尽きたストリームを読んだ (PEP 479)
+        except Exception as error:
+            self._error = error
+            raise
+        finally:
+            with lock:
+                self._producer = None
+                if self._waiting:
+                    _memo_conditions[stripe].notify_all()
+        if position < len(memo):
+            return memo[position]
+        raise StopIteration
+
+    @property
+    def failed(self) -> bool:
+        """
+        the iterator raised an exception other than the end of the values
+        """
+        return self._error is not None
+
+    def __wait(self, stripe: int) -> None:
+        """
+        ストライプのロックを持った状態で、生成担当スレッドの通知を待つ
+        (同じストライプの他のメモの通知でも起きるので、呼び出し側で条件を確かめ直す)
+        """
+        self._waiting += 1
+        try:
+            _memo_conditions[stripe].wait()
+        finally:
+            self._waiting -= 1
+
+    def __extend(self, position: int) -> None:
+        """
+        生成担当スレッドとして position まで値を追加する
+        """
+        memo: list[T] = self.__memo
+        for v in islice(self._iterator, position - len(memo) + 1):
+            memo.append(v)  # 一要素ずつ公開し、自己参照する生成器が直前の値を読めるようにする
+        if position >= len(memo):
+            self._exhausted = True
+
+    @contextmanager
+    def idle(self) -> Iterator[None]:
+        """
+        生成中のスレッドが無い間だけ処理を行う (イテレータの状態を読むため)
+        ストライプのロックを持ったままなので、その間に他のメモを伸ばしてはならない
+        """
+        stripe: int = _stripe(self)
+        with _memo_locks[stripe]:
+            while self._producer is not None:
+                if self._producer == threading.get_ident():
+                    raise ValueError("memoized sequence is being extended by this thread")
+                self.__wait(stripe)
+            yield
+
+    @classmethod
+    def resumed(cls, iterator: Iterator[T], offset: int, values: list[T]) -> MemoizedInfiniteSequence[T]:
+        """
+        インデックス offset 以降の計算済みの値から再開する
+        """
+        memo: MemoizedInfiniteSequence[T] = cls(_iterator=iterator, _offset=offset)
+        memo.__memo.extend(values)
+        return memo
+
+    def uncomputed(self) -> Iterator[T]:
+        """
+        values after the computed ones, straight from the iterator without memoizing them
+        """
+        return self._iterator
+
+    def tail(self, start: int) -> list[T]:
+        """
+        values from start to the last computed index
+        """
+        return self.__memo[max(start - self._offset, 0):]
 
 
-@dataclasses.dataclass
 class Stream(Generic[T]):
     """
     ストリーム
+    メモへの参照とカーソル位置だけを持つ (コピーはカーソルを一つ作るだけ)
     """
-    values: MemoizedInfiniteSequence[T]  # メモ化された値リストとイテレータの組
-    _current_index: int = 0  # 現在のカーソル位置
+    __slots__ = ("values", "_current_index")
+
+    def __init__(self, values: MemoizedInfiniteSequence[T], _current_index: int = 0):
+        self.values: MemoizedInfiniteSequence[T] = values  # メモ化された値リストとイテレータの組
+        self._current_index: int = _current_index  # 現在のカーソル位置
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(values={self.values!r}, _current_index={self._current_index})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.values, self._current_index) == (other.values, other._current_index)
+
+    __hash__ = None
 
     def __iter__(self):
         return self
 
     def __next__(self):
+        lock: threading.Lock = _cursor_locks[_stripe(self)]
+        with lock:  # 複数スレッドが同じカーソルを進めても同じ値を二度返さない
+            index: int = self._current_index
+            self._current_index = index + 1
         try:
-            current_value: T = self.values.value(self._current_index)
-            self._current_index += 1
-            return current_value
-        except StopIteration:
-            raise StopIteration
+            return self.values.value(index)
+        except BaseException:
+            with lock:  # 値が無ければカーソルを戻す (他のスレッドが先へ進めていなければ)
+                if self._current_index == index + 1:
+                    self._current_index = index
+            raise
 
     def __mul__(self, other) -> Stream[T]:
-        if isinstance(other, self.__class__):
+        if isinstance(other, Stream):
             return multiply_2streams(self, other)
         return scale_streams(self, other)
 
     def __add__(self, other) -> Stream[T]:
-        if not isinstance(other, self.__class__):
+        if not isinstance(other, Stream):
             raise NotImplementedError()
         return add_2streams(self, other)
 
     def __neg__(self) -> Stream[T]:
-        return make_stream((-v for v in self.values), initial_index=self._current_index)
+        start: int = self.values._offset  # チェックポイントから再開したメモは、それより前の値を持たない
+        return Stream(values=MemoizedInfiniteSequence(_iterator=(-v for v in self.cursor(start)), _offset=start),
+                      _current_index=self._current_index)
 
     def __sub__(self, other) -> Stream[T]:
-        if not isinstance(other, self.__class__):
+        if not isinstance(other, Stream):
             raise NotImplementedError()
         return self + (-other)
 
@@ -86,21 +247,28 @@ class Stream(Generic[T]):
         """
         return self.values[n]
 
+    def cursor(self, index: int) -> Stream[T]:
+        """
+        new cursor of the same type over the same memo
+        """
+        view: Stream[T] = object.__new__(self.__class__)
+        view.values = self.values
+        view._current_index = index
+        return view
+
     @property
     def rewound(self) -> Stream:
         """
-        from start
+        from start (再開したメモでは、残っている最初の値から)
         """
-        return Stream(values=self.values)
+        return self.cursor(self.values._offset)
 
     @property
     def second_latest(self) -> T:
         """
         2nd latest value
         """
-        if self._current_index < 2:
-            return self.values[0]
-        return self.nth(self._current_index - 2)
+        return self.nth(max(self._current_index - 2, self.values._offset))
 
 
 def make_stream(iterator: Iterator[T], initial_index=0) -> Stream[T]:
@@ -117,7 +285,24 @@ def copy_stream(s: Stream[T]) -> Stream[T]:
     """
     copy a stream
     """
-    return Stream(values=s.values, _current_index=s.current_index)
+    return s.cursor(s.current_index)
+
+
+def unmemoized(stream: Stream[T]) -> Iterator[T]:
+    """
+    values from the cursor on, without keeping them in the memo
+    メモに無い値は元のイテレータから直接取るので、このストリームを他と共有してはならない
+    レジストリに登録されたメモは共有されているので、イテレータを消費せずにメモを通して読む
+    """
+    memo: MemoizedInfiniteSequence[T] = stream.values
+    index: int = stream.current_index
+    if memo._shared:
+        yield from stream.cursor(index)
+        return
+    while index < len(memo):
+        yield memo[index]
+        index += 1
+    yield from memo.uncomputed()
 
 
 def stream_reference(stream: Stream[T], n: int) -> T:
@@ -224,6 +409,158 @@ def merge(*streams) -> Stream[T]:
     return merge_2streams(streams[0], merge(*streams[1:]))
 
 
+_END = object()  # 有限のストリームの終わり
+
+
+def _value_at(stream: Stream[T], index: int):
+    """
+    value at index, or _END after the end of a finite stream
+    """
+    try:
+        return stream.values[index]
+    except StopIteration:
+        return _END
+
+
+def _gallop(stream: Stream[T], index: int, target: T, strict: bool) -> int:
+    """
+    smallest index >= index whose value is >= target (> target if strict), or the end of a finite stream
+    計算済みのメモの中は指数探索と二分探索で飛ばし、その先は値を一つずつ計算しながら進む
+    """
+    memo: MemoizedInfiniteSequence[T] = stream.values
+
+    def before(v: T) -> bool:
+        return v <= target if strict else v < target
+
+    computed: int = len(memo)
+    if index < computed and before(memo[index]):
+        low: int = index  # before(memo[low])
+        step: int = 1
+        while low + step < computed and before(memo[low + step]):
+            low += step
+            step *= 2
+        high: int = min(low + step, computed)  # memo[high] は before でないか、未計算
+        while high - low > 1:
+            middle: int = (low + high) // 2
+            if before(memo[middle]):
+                low = middle
+            else:
+                high = middle
+        index = high
+    while True:
+        v = _value_at(stream, index)
+        if v is _END or not before(v):
+            return index
+        index += 1
+
+
+def union(*streams: Stream[T]) -> Stream[T]:
+    """
+    values in any of the sorted streams, without duplicates
+    """
+    def union_generator() -> Iterator[T]:
+        """
+        union
+        """
+        positions: list[int] = [s.current_index for s in streams]
+        while True:
+            heads: list = [_value_at(s, i) for s, i in zip(streams, positions)]
+            alive: list = [v for v in heads if v is not _END]
+            if not alive:
+                return
+            smallest: T = min(alive)
+            yield smallest
+            for k, v in enumerate(heads):
+                if v is not _END and not smallest < v:
+                    positions[k] = _gallop(streams[k], positions[k], smallest, strict=True)
+    return make_stream(union_generator())
+
+
+def intersection(*streams: Stream[T]) -> Stream[T]:
+    """
+    values in all of the sorted streams, without duplicates
+    長く一致しない区間は _gallop で飛ばす
+    """
+    def intersection_generator() -> Iterator[T]:
+        """
+        intersection
+        """
+        positions: list[int] = [s.current_index for s in streams]
+        candidate = _value_at(streams[0], positions[0])
+        while candidate is not _END:
+            agreed: int = 0
+            k: int = 0
+            while agreed < len(streams):  # 全ストリームが candidate で揃うまで、大きい方へ寄せる
+                positions[k] = _gallop(streams[k], positions[k], candidate, strict=False)
+                v = _value_at(streams[k], positions[k])
+                if v is _END:
+                    return
+                if candidate < v:
+                    candidate = v
+                    agreed = 1
+                else:
+                    agreed += 1
+                k = (k + 1) % len(streams)
+            yield candidate
+            positions[0] = _gallop(streams[0], positions[0], candidate, strict=True)
+            candidate = _value_at(streams[0], positions[0])
+    if not streams:
+        raise ValueError("intersection needs at least one stream.")
+    return make_stream(intersection_generator())
+
+
+def difference(stream: Stream[T], *others: Stream[T]) -> Stream[T]:
+    """
+    values in the first sorted stream but in none of the others, without duplicates
+    """
+    def difference_generator() -> Iterator[T]:
+        """
+        difference
+        """
+        index: int = stream.current_index
+        positions: list[int] = [s.current_index for s in others]
+        while True:
+            v = _value_at(stream, index)
+            if v is _END:
+                return
+            excluded: bool = False
+            for k, other in enumerate(others):
+                positions[k] = _gallop(other, positions[k], v, strict=False)
+                w = _value_at(other, positions[k])
+                if w is not _END and not v < w:
+                    excluded = True
+                    break
+            if not excluded:
+                yield v
+            index = _gallop(stream, index, v, strict=True)
+    return make_stream(difference_generator())
+
+
+def symmetric_difference(*streams: Stream[T]) -> Stream[T]:
+    """
+    values in an odd number of the sorted streams, without duplicates
+    """
+    def symmetric_difference_generator() -> Iterator[T]:
+        """
+        symmetric difference
+        """
+        positions: list[int] = [s.current_index for s in streams]
+        while True:
+            heads: list = [_value_at(s, i) for s, i in zip(streams, positions)]
+            alive: list = [v for v in heads if v is not _END]
+            if not alive:
+                return
+            smallest: T = min(alive)
+            n_containing: int = 0
+            for k, v in enumerate(heads):
+                if v is not _END and not smallest < v:
+                    n_containing += 1
+                    positions[k] = _gallop(streams[k], positions[k], smallest, strict=True)
+            if n_containing % 2 == 1:
+                yield smallest
+    return make_stream(symmetric_difference_generator())
+
+
 def integers_starting_from(n: int) -> Stream[int]:
     """
     infinite stream of numbers from
@@ -0,0 +1,69 @@
+"""
+modules package
+
+サブモジュールは属性に最初にアクセスしたときに読み込む (PEP 562)。
+起動を軽くするため、このファイルでは typing も読み込まない。
+クラス Stream, Series はサブモジュールと同名なので modules.Stream.Stream のように参照する。
+"""
+from __future__ import annotations
+
+import importlib
+from types import ModuleType
+
+_SUBMODULE_ATTRIBUTES: dict[str, tuple[str, ...]] = {
+    "Stream": ("MemoizedInfiniteSequence", "make_stream", "copy_stream", "unmemoized", "stream_reference",
+               "multiply_2streams", "multiply_streams", "add_2streams", "add_streams", "partial_sums",
+               "scale_streams", "merge_2streams", "merge", "union", "intersection", "difference",
+               "symmetric_difference", "integers_starting_from", "integers",
+               "stream_limit", "interleave", "pairs", "pairs_all", "triples"),
+    "Sequence": ("fibonacci_generator", "eratosthenes_sieve", "prime_generator", "primes", "ones",
+                 "integers_from_ones", "fibonacci_adding", "double", "factorial", "humming_stream", "expand",
+                 "radix_digit_blocks", "RadixExpansionSequence", "RadixExpansionStream", "radix_expansion",
+                 "radix_digits", "pythagorean_triples"),
+    "Series": ("Support", "StructuredSequence", "ConvergenceWarning", "make_series", "polynomial",
+               "integrated_coefficients", "negate_series", "exponential", "sine", "cosine", "add_2series", "add_series",
+               "multiply_2series", "multiply_series", "inverted_unit_series", "divide_series", "constant_series",
+               "tangent", "secant", "coefficient_buffer", "compose_series", "revert_series", "log_series", "exp_series",
+               "sqrt_series", "power_series"),
+    "Convergense3_5_3": ("sqrt_improve", "sqrt_stream", "pi_summands", "pi_stream", "euler_transform",
+                         "make_tableau", "accelerated_sequence", "ln2_summands", "ln2_stream", "pi_fractions",
+                         "pi_decimals", "pi_digits", "ln2_fractions", "ln2_decimals", "ln2_digits"),
+    "Recurrence": ("linear_recurrence_generator", "kitamasa", "LinearRecurrenceSequence", "LinearRecurrenceStream",
+                   "linear_recurrence", "from_generating_function"),
+    "DifferentialEquation": ("integral", "TaylorTerm", "taylor_series_solution", "taylor_solve", "horner"),
+    "Math": ("power", "miller_test", "is_prime", "is_divisible", "pollard_rho", "factorize", "multiplicative_order"),
+    "Checkpoint": ("CheckpointError", "Producer", "SqrtProducer", "AlternatingPartialSumProducer",
+                   "EulerAcceleratedProducer", "PrimeProducer", "PolynomialODEProducer", "checkpointable_stream",
+                   "save_checkpoint", "load_checkpoint", "checkpointing"),
+    "Registry": ("StreamRegistry", "default_registry", "canonical"),
+    "Backend": ("numpy_backend", "gmpy2_backend"),
+    "Prefetch": ("Prefetcher", "PrefetchingStream", "prefetched"),
+    "Channel": ("ChannelError", "StreamPublisher", "ChannelSequence", "attach"),
+}
+
+_ATTRIBUTE_MODULES: dict[str, str] = {
+    attribute: module for module, attributes in _SUBMODULE_ATTRIBUTES.items() for attribute in attributes}
+
+__all__ = sorted(_ATTRIBUTE_MODULES)
+
+
+def _submodule(name: str) -> ModuleType:
+    """
+    import a submodule
+    """
+    return importlib.import_module(f"{__name__}.{name}")
+
+
+def __getattr__(name: str) -> object:
+    if name in _ATTRIBUTE_MODULES:
+        value: object = getattr(_submodule(_ATTRIBUTE_MODULES[name]), name)
+    elif name in _SUBMODULE_ATTRIBUTES or name == "Benchmark":
+        value = _submodule(name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # 二度目以降は通常の属性参照
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_ATTRIBUTE_MODULES) | set(_SUBMODULE_ATTRIBUTES))
@@ -0,0 +1,239 @@
+"""
+command line entry point
+
+    python -m modules primes -n 1000000 -o primes.txt
+    python -m modules sqrt --x 2 --tolerance 1e-12
+    python -m modules tangent --terms 500 --ring fraction -f jsonl
+    python -m modules accelerate euler ln2 -n 8
+
+値はブロック単位で書き出して flush するので、要素数が多くてもメモリは一定で済む。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+import sys
+import time
+from fractions import Fraction
+from itertools import count
+from typing import Callable, Iterator, Optional, TextIO, BinaryIO
+
+from modules.Stream import Stream, unmemoized
+
+StreamFactory = Callable[[argparse.Namespace], Stream]
+
+
+def _ring_unit(ring: str):
+    """
+    unit of the coefficient ring named on the command line
+    """
+    return Fraction(1) if ring == "fraction" else 1.0
+
+
+def _primes(_arguments: argparse.Namespace) -> Stream[int]:
+    from modules.Sequence import primes
+    return primes.__wrapped__()  # 登録せず、このコマンドだけのメモを作る
+
+
+def _integers(arguments: argparse.Namespace) -> Stream[int]:
+    from modules.Stream import integers_starting_from
+    return integers_starting_from(arguments.start)
+
+
+def _sqrt(arguments: argparse.Namespace) -> Stream[float]:
+    from modules.Convergense3_5_3 import sqrt_stream
+    return sqrt_stream.__wrapped__(arguments.x)
+
+
+def _pi(_arguments: argparse.Namespace) -> Stream[float]:
+    from modules.Convergense3_5_3 import pi_stream
+    return pi_stream.__wrapped__()
+
+
+def _ln2(_arguments: argparse.Namespace) -> Stream[float]:
+    from modules.Convergense3_5_3 import ln2_stream
+    return ln2_stream.__wrapped__()
+
+
+def _series(name: str) -> StreamFactory:
+    """
+    coefficient stream of a series in modules.Series
+    """
+    def factory(arguments: argparse.Namespace) -> Stream:
+        """
+        factory
+        """
+        import modules.Series
+        return getattr(modules.Series, name)(_ring_unit(arguments.ring)).coefficients  # 登録済みなのでメモを通して読む
+    return factory
+
+
+_TRANSFORMABLE: dict[str, StreamFactory] = {"pi": _pi, "ln2": _ln2, "sqrt": _sqrt}
+
+
+def _accelerate(arguments: argparse.Namespace) -> Stream[float]:
+    from modules.Convergense3_5_3 import accelerated_sequence, euler_transform
+    transforms: dict[str, Callable[[Stream[float]], Stream[float]]] = {"euler": euler_transform}
+    return accelerated_sequence(transforms[arguments.transform], _TRANSFORMABLE[arguments.stream](arguments))
+
+
+def _parser() -> argparse.ArgumentParser:
+    """
+    argument parser
+    """
+    common: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-n", "--count", "--terms", dest="count", type=int, default=None,
+                        help="number of elements (unbounded if omitted)")
+    common.add_argument("--tolerance", type=float, default=None,
+                        help="stop when two successive elements differ by less than this (exercise 3.64)")
+    common.add_argument("--time-budget", type=float, default=None, help="stop after this many seconds")
+    common.add_argument("-o", "--output", default="-", help="output file ('-' for stdout)")
+    common.add_argument("-f", "--format", choices=("text", "csv", "jsonl", "binary"), default="text")
+    common.add_argument("--block-size", type=int, default=65536, help="elements written per flush")
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m modules", description="evaluate a stream and write its elements")
+    commands = parser.add_subparsers(dest="stream", required=True, metavar="STREAM")
+
+    commands.add_parser("primes", parents=[common], help="prime numbers").set_defaults(factory=_primes)
+    integers = commands.add_parser("integers", parents=[common], help="integers")
+    integers.add_argument("--start", type=int, default=0)
+    integers.set_defaults(factory=_integers)
+    sqrt = commands.add_parser("sqrt", parents=[common], help="sec 3.5.3 sqrt-stream")
+    sqrt.add_argument("--x", type=float, required=True)
+    sqrt.set_defaults(factory=_sqrt)
+    commands.add_parser("pi", parents=[common], help="sec 3.5.3 pi-stream").set_defaults(factory=_pi)
+    commands.add_parser("ln2", parents=[common], help="exercise 3.65 ln2-stream").set_defaults(factory=_ln2)
+    for name in ("exponential", "sine", "cosine", "tangent", "secant"):
+        series = commands.add_parser(name, parents=[common], help=f"coefficients of the {name} series")
+        series.add_argument("--ring", choices=("float", "fraction"), default="float")
+        series.set_defaults(factory=_series(name))
+    accelerate = commands.add_parser("accelerate", parents=[common], help="sec 3.5.3 accelerated-sequence")
+    accelerate.add_argument("transform", choices=("euler",))
+    accelerate.add_argument("stream", choices=sorted(_TRANSFORMABLE), metavar="target")
+    accelerate.add_argument("--x", type=float, default=2.0, help="argument of sqrt")
+    accelerate.set_defaults(factory=_accelerate)
+    return parser
+
+
+def limited(values: Iterator, n: Optional[int], tolerance: Optional[float],
+            time_budget: Optional[float]) -> Iterator:
+    """
+    values up to a count, a tolerance of successive elements or a time budget
+    """
+    deadline: Optional[float] = None if time_budget is None else time.monotonic() + time_budget
+    previous = None
+    for index in count():
+        if n is not None and index >= n:
+            return
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+        try:
+            value = next(values)
+        except StopIteration:
+            return
+        except RuntimeError as error:  # 再帰で定義されたストリームが再帰の深さの上限に達した
+            print(f"stopped after {index} elements: {error}", file=sys.stderr)
+            return
+        yield value
+        if tolerance is not None and previous is not None and abs(value - previous) < tolerance:
+            return
+        previous = value
+
+
+def _text_record(value) -> str:
+    return f"{value}\n"
+
+
+def _jsonl_record(value) -> str:
+    if isinstance(value, Fraction):
+        return json.dumps({"numerator": value.numerator, "denominator": value.denominator}) + "\n"
+    return json.dumps(value) + "\n"
+
+
+def write_text(values: Iterator, output: TextIO, record: Callable[[object], str], block_size: int) -> int:
+    """
+    write records in blocks
+    Returns:
+        number of elements written
+    """
+    written: int = 0
+    block: list[str] = []
+    for value in values:
+        block.append(record(value))
+        if len(block) >= block_size:
+            output.write("".join(block))
+            output.flush()
+            written += len(block)
+            block.clear()
+    output.write("".join(block))
+    output.flush()
+    return written + len(block)
+
+
+def write_binary(values: Iterator, output: BinaryIO, block_size: int) -> int:
+    """
+    write little-endian int64 (integer streams) or float64 (others) in blocks
+    Returns:
+        number of elements written
+    """
+    written: int = 0
+    packer: Optional[struct.Struct] = None
+    block: list = []
+
+    def flush() -> None:
+        """
+        write the block
+        """
+        output.write(b"".join(map(packer.pack, block)))
+        output.flush()
+
+    for value in values:
+        if packer is None:
+            if isinstance(value, Fraction):
+                raise ValueError("binary output needs integer or float elements")
+            packer = struct.Struct("<q" if isinstance(value, int) else "<d")
+        block.append(value)
+        if len(block) >= block_size:
+            flush()
+            written += len(block)
+            block.clear()
+    if block:
+        flush()
+    return written + len(block)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """
+    entry point
+    """
+    arguments: argparse.Namespace = _parser().parse_args(argv)
+    values: Iterator = limited(unmemoized(arguments.factory(arguments)),
+                               arguments.count, arguments.tolerance, arguments.time_budget)
+    binary: bool = arguments.format == "binary"
+    if arguments.output == "-":
+        output = sys.stdout.buffer if binary else sys.stdout
+        close: bool = False
+    else:
+        output = open(arguments.output, "wb" if binary else "w", encoding=None if binary else "utf-8")
+        close = True
+    try:
+        if binary:
+            write_binary(values, output, arguments.block_size)
+        else:
+            if arguments.format == "csv":
+                output.write("value\n")
+            record: Callable[[object], str] = {"text": _text_record, "csv": _text_record,
+                                               "jsonl": _jsonl_record}[arguments.format]
+            write_text(values, output, record, arguments.block_size)
+    except BrokenPipeError:
+        return 1
+    finally:
+        if close:
+            output.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
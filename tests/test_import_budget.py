@@ -0,0 +1,26 @@
+"""
+import-time budget of the modules package
+"""
+import os
+import subprocess
+import sys
+
+from modules.Benchmark import IMPORT_TIME_BUDGET
+
+ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+N_TRIALS: int = 5
+
+
+def _import_time() -> float:
+    """
+    seconds to import modules in a fresh interpreter
+    """
+    script: str = "import time; start = time.perf_counter(); import modules; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(result.stdout)
+
+
+def test_import_modules_within_budget():
+    seconds: float = min(_import_time() for _ in range(N_TRIALS))  # 最良の値で比べ、負荷による揺らぎを避ける
+    assert seconds <= IMPORT_TIME_BUDGET, \
+        f"import modules took {seconds * 1.0e3:.2f} ms (budget {IMPORT_TIME_BUDGET * 1.0e3:.0f} ms)"